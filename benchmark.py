@@ -0,0 +1,260 @@
+#!/usr/bin/python3
+#
+# Copyright (c) 2015 Vrije Universiteit Brussel
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+""" Measure the throughput of the combinations of worlds, learning algorithms,
+    exploration strategies and models supported by main.py. Every workload
+    runs a fixed number of episodes with fixed random seeds, in its own
+    process, so that its peak memory usage can be measured.
+
+    Usage: benchmark.py run <results file> [argument...]
+           benchmark.py compare <baseline results file> <results file> [tolerance]
+
+    "run" benchmarks every combination that contains all the given arguments
+    (for instance "benchmark.py run results.json gridworld discrete") and
+    writes the results in a JSON file. "compare" prints the throughput of two
+    results files, produced for instance by two checkouts of this repository,
+    and exits with status 1 if a workload is more than tolerance (0.1 by
+    default) slower in the second file.
+"""
+
+from __future__ import print_function
+import sys
+import os
+import json
+import random
+import resource
+import itertools
+import subprocess
+
+WORLDS = ['gridworld', 'pogridworld', 'polargridworld', 'tmaze']
+LEARNINGS = ['qlearning', 'batchqlearning', 'advantage', 'batchadvantage']
+EXPLORATIONS = ['egreedy', 'softmax', 'tableadaptivesoftmax']
+MODELS = ['discrete', 'tilecoding', 'numpynnet', 'kerasnnet', 'fannnnet', 'lstm', 'gru', 'mut1', 'mut2', 'mut3', 'clstm']
+
+# Module that has to be importable for a model to be benchmarked
+MODEL_BACKENDS = {
+    'kerasnnet': 'keras',
+    'fannnnet': 'fann2',
+    'lstm': 'keras',
+    'gru': 'keras',
+    'mut1': 'keras',
+    'mut2': 'keras',
+    'mut3': 'keras',
+    'clstm': 'clstm',
+}
+
+EPISODES = 200                  # Episodes of a workload using a discrete model
+NNET_EPISODES = 20              # Episodes of a workload using a neural network
+MAX_TIMESTEPS = 100
+REPEATS = 3                     # The fastest of REPEATS runs of a workload is kept
+SEED = 1
+
+def available_models(models):
+    """ Return the models of @p models whose backend can be imported
+    """
+    result = []
+
+    for model in models:
+        backend = MODEL_BACKENDS.get(model)
+
+        if backend is not None:
+            try:
+                __import__(backend)
+            except ImportError:
+                continue
+
+        result.append(model)
+
+    return result
+
+def make_workloads(worlds, learnings, explorations, models):
+    """ Return the list of workloads (lists of command-line arguments
+        understood by main.configure()) of the world x learning x exploration
+        x model grid.
+    """
+    return [
+        [world, learning, exploration, model]
+        for world, learning, exploration, model in itertools.product(worlds, learnings, explorations, models)
+    ]
+
+def workload_key(workload):
+    """ Name under which the results of a workload are stored
+    """
+    return ' '.join(workload)
+
+def peak_rss():
+    """ Return the peak resident memory of this process, in kilobytes
+    """
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    if sys.platform == 'darwin':
+        # Mac OS X reports bytes instead of kilobytes
+        rss //= 1024
+
+    return rss
+
+def run_workload(workload):
+    """ Run a workload in the current process and return a dictionary with
+        its throughput, the time spent in model.learn() and the peak memory
+        usage of the process.
+    """
+    import numpy
+    import main
+    from world.profiler import Profiler
+    from world.actionsampler import ActionSampler
+
+    random.seed(SEED)
+    numpy.random.seed(SEED)
+
+    experiment = main.configure(workload)
+    world = experiment['world']
+    world.sampler = ActionSampler(SEED)
+    num_episodes = EPISODES if 'discrete' in workload else NNET_EPISODES
+
+    # Collect the number of steps and the time spent learning
+    world.profiler = Profiler(None)
+    world.run(
+        experiment['model'],
+        experiment['learning'],
+        num_episodes,
+        MAX_TIMESTEPS,
+        experiment['batch_size'],
+        False,
+        replay=experiment['replay']
+    )
+
+    summary = world.profiler.summary()
+    learn = summary['phases'].get('learn')
+
+    return {
+        'workload': workload_key(workload),
+        'episodes': summary['episodes'],
+        'steps': summary['steps'],
+        'elapsed': summary['elapsed'],
+        'steps_per_second': summary['steps_per_second'],
+        'episodes_per_second': summary['episodes'] / summary['elapsed'],
+        'learn_time': learn['total'] if learn is not None else 0.0,
+        'peak_rss_kb': peak_rss(),
+    }
+
+def run_isolated(workload):
+    """ Run a workload in a new Python process, so that it does not share
+        its memory usage or state with other workloads. Return its results,
+        or None if it failed.
+    """
+    try:
+        output = subprocess.check_output(
+            [sys.executable, os.path.abspath(__file__), 'single'] + workload
+        )
+    except subprocess.CalledProcessError:
+        return None
+
+    # The result is the last line printed by the process
+    return json.loads(output.decode('utf-8').strip().split('\n')[-1])
+
+def benchmark(workloads, repeats=REPEATS):
+    """ Run every workload @p repeats times and return the list of the results
+        of its fastest run
+    """
+    results = []
+
+    for workload in workloads:
+        runs = [run_isolated(workload) for i in range(repeats)]
+        runs = [run for run in runs if run is not None]
+
+        if len(runs) == 0:
+            print('%s: failed' % workload_key(workload))
+            continue
+
+        result = max(runs, key=lambda run: run['steps_per_second'])
+        result['peak_rss_kb'] = max([run['peak_rss_kb'] for run in runs])
+        results.append(result)
+
+        print('%-45s %10.1f steps/s %8.1f episodes/s  learn=%7.3f s  rss=%7i kB' % (
+            result['workload'],
+            result['steps_per_second'],
+            result['episodes_per_second'],
+            result['learn_time'],
+            result['peak_rss_kb']
+        ))
+
+    return results
+
+def compare(baseline, results, tolerance):
+    """ Print the throughput of the workloads present in @p baseline and
+        @p results, and return the keys of the workloads whose throughput
+        dropped by more than @p tolerance (a fraction)
+    """
+    baseline = dict([(result['workload'], result) for result in baseline])
+    regressions = []
+
+    for result in results:
+        old = baseline.get(result['workload'])
+
+        if old is None:
+            continue
+
+        ratio = result['steps_per_second'] / old['steps_per_second']
+        regressed = ratio < 1.0 - tolerance
+
+        if regressed:
+            regressions.append(result['workload'])
+
+        print('%-45s %10.1f -> %10.1f steps/s (%+6.1f%%)%s' % (
+            result['workload'],
+            old['steps_per_second'],
+            result['steps_per_second'],
+            (ratio - 1.0) * 100.0,
+            '  REGRESSION' if regressed else ''
+        ))
+
+    return regressions
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)['results']
+
+if __name__ == '__main__':
+    if len(sys.argv) >= 2 and sys.argv[1] == 'single':
+        # Worker process launched by run_isolated()
+        print(json.dumps(run_workload(sys.argv[2:])))
+    elif len(sys.argv) >= 3 and sys.argv[1] == 'run':
+        filters = sys.argv[3:]
+        workloads = [
+            workload for workload in make_workloads(WORLDS, LEARNINGS, EXPLORATIONS, available_models(MODELS))
+            if all([f in workload for f in filters])
+        ]
+
+        results = benchmark(workloads)
+
+        with open(sys.argv[2], 'w') as f:
+            json.dump({'episodes': EPISODES, 'max_timesteps': MAX_TIMESTEPS, 'results': results}, f, indent=4)
+    elif len(sys.argv) >= 4 and sys.argv[1] == 'compare':
+        tolerance = float(sys.argv[4]) if len(sys.argv) > 4 else 0.1
+        regressions = compare(load_results(sys.argv[2]), load_results(sys.argv[3]), tolerance)
+
+        if len(regressions) > 0:
+            print('%i workloads are slower than the baseline' % len(regressions))
+            sys.exit(1)
+    else:
+        print(__doc__)
+        sys.exit(1)
@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+#
+# Copyright (c) 2015 Vrije Universiteit Brussel
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+""" Check that the NumPy RecurrentRuntime predicts the same values as Keras
+    for every recurrent model of main.py. Each model is built with random
+    weights (biases included), and the values predicted by both for random
+    sequences of observations are compared.
+
+    Usage: checkruntime.py [model...]
+"""
+
+from __future__ import print_function
+import sys
+
+from numpy.random import RandomState
+from numpy import float32
+
+MODELS = ['gru', 'lstm', 'mut1', 'mut2', 'mut3']
+NB_ACTIONS = 4
+STATE_SIZE = 6
+SEQUENCES = 16
+
+def check(name, random):
+    """ Return the largest difference between the values predicted by Keras and
+        the runtime for the model @p name, or raise ValueError
+    """
+    import main
+
+    main.configure_theano()
+
+    model = main.MODELS.create(name, NB_ACTIONS, ['numpyruntime'], random)
+    model._model = model.createModel(STATE_SIZE)
+    model._model.set_weights([random.uniform(-0.5, 0.5, size=w.shape).astype(w.dtype) for w in model._model.get_weights()])
+
+    observations = random.uniform(-1.0, 1.0, size=(SEQUENCES, model.history_length, STATE_SIZE))
+
+    return model.checkRuntime(observations.astype(float32))
+
+if __name__ == '__main__':
+    try:
+        import keras
+    except ImportError:
+        print('Keras is not installed, the runtime cannot be compared with it')
+        sys.exit(1)
+
+    random = RandomState(1)
+    failed = False
+
+    for name in (sys.argv[1:] or MODELS):
+        try:
+            print('%s: largest difference %g' % (name, check(name, random)))
+        except ValueError as e:
+            print('%s: %s' % (name, e))
+            failed = True
+
+    sys.exit(1 if failed else 0)
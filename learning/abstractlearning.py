@@ -19,6 +19,8 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
+from numpy import array, float64
+
 class AbstractLearning(object):
     """ Abstract class for learning strategies. Instances of this class receive
         state observations and rewards and have to choose the action to perform.
@@ -42,9 +44,44 @@ class AbstractLearning(object):
         """
         raise NotImplementedError('The learning strategy does not implement action()')
 
+    def actionsBatch(self, episodes):
+        """ Batched version of actions(), used to choose the actions of many
+            episodes at once (the copies of a vector world for instance).
+
+            @return A tuple of two elements : an array having one row of
+                    nb_actions elements per episode, and an array of TD errors.
+                    By default, actions() is called for each episode, so that
+                    the on-line update rules are still applied to every episode.
+        """
+        results = [self.actions(episode) for episode in episodes]
+
+        return (
+            array([r[0] for r in results], dtype=float64).reshape((len(episodes), self.nb_actions)),
+            array([r[1] for r in results], dtype=float64)
+        )
+
+    def getState(self):
+        """ Return a dictionary of NumPy arrays describing the state of the
+            learning algorithm between two episodes, see Checkpointer
+        """
+        return {}
+
+    def setState(self, state):
+        """ Restore a state returned by getState()
+        """
+        pass
+
     def finishEpisode(self, episode):
         """ Called when an episode is finished. The episode contains the last state
             and reward observed. By default, this method calls actions() so that
             an on-line update rule can be applied for the last time step.
         """
         self.actions(episode)
+
+    def finishEpisodes(self, episodes):
+        """ Called when several episodes are finished at the same time, for
+            instance by a vector world. By default, finishEpisode() is called
+            for each of them.
+        """
+        for episode in episodes:
+            self.finishEpisode(episode)
@@ -18,25 +18,38 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
-from numpy import array, float32
+from numpy import array, maximum, float32
 
 from .softmaxlearning import *
+from .temperaturetable import *
 
 try:
     from keras.models import Sequential
     from keras.layers.core import Dense, Activation, Dropout
 except ImportError:
-    print('Keras is not installed, AdaptiveSoftmaxLearning is unavailable')
+    print('Keras is not installed, AdaptiveSoftmaxLearning can only use a TemperatureTable')
 
 class AdaptiveSoftmaxLearning(SoftmaxLearning):
     """ Softmax action selection that increases its temperature for states having
         a big TD error.
     """
-    def __init__(self, nb_actions, learning, hidden_neurons, discount_factor):
+    def __init__(self, nb_actions, learning, hidden_neurons, discount_factor, buckets=None):
+        """ Constructor.
+
+            @param nb_actions Number of actions that are possible in the world
+            @param learning Learning method used when exploitation steps are taken
+            @param hidden_neurons Number of hidden neurons of the perceptron
+                                  that predicts the temperatures
+            @param discount_factor Discount factor (beta) of the TD errors
+            @param buckets If not None, the temperatures are stored in a
+                           TemperatureTable of that many buckets instead of
+                           being predicted by a Keras perceptron
+        """
         super(AdaptiveSoftmaxLearning, self).__init__(nb_actions, learning, 1.0)
 
         self.hidden_neurons = hidden_neurons
         self.discount_factor = discount_factor
+        self.buckets = buckets
 
         self._model = None
         self._states = []
@@ -45,14 +58,7 @@ class AdaptiveSoftmaxLearning(SoftmaxLearning):
     def adjustTemperature(self, episode, td_error):
         # Create the model for the TD error when we know the state-space size
         if self._model is None:
-            self._model = Sequential()
-
-            self._model.add(Dense(len(episode.states[0]), self.hidden_neurons, init='uniform', activation='tanh'))
-            self._model.add(Dense(self.hidden_neurons, 1, init='uniform', activation='linear'))
-
-            print('Compiling TD-error model...')
-            self._model.compile(loss='mse', optimizer='rmsprop')
-            print('Compiled')
+            self._model = self.createModel(len(episode.states[0]))
 
         # Compute the new temperature : y(t) = |td_error| + beta*y(t+1)
         #
@@ -62,14 +68,14 @@ class AdaptiveSoftmaxLearning(SoftmaxLearning):
         # Because t+1 is not yet known, another formula is used: the model
         # is used to predict y(t), and y(t-1) = |td_error| + beta*y(t) is used
         # to train the model for the previous observation
-        current_state = episode.states[-1]
-        current_temperature = self._model.predict(self.make_data([current_state]))[0][0]
+        current_state = episode.states.array()[-1:]
+        current_temperature = self._model.predict(current_state)[0][0]
 
         updated_temperature = abs(td_error) + self.discount_factor * current_temperature
 
         if len(episode.states) > 1:
             # Store the updated value in the current batch
-            previous_state = episode.states[-2]
+            previous_state = list(episode.states[-2])
 
             self._states.append(previous_state)
             self._values.append([updated_temperature])
@@ -77,9 +83,75 @@ class AdaptiveSoftmaxLearning(SoftmaxLearning):
         # Use the new tempoerature (without allowing it to be too small)
         self.temperature = max(current_temperature, 0.2)
 
+    def adjustTemperatures(self, episodes, td_errors):
+        # Same as adjustTemperature(), with one prediction for all the episodes
+        if self._model is None:
+            self._model = self.createModel(len(episodes[0].states[0]))
+
+        current_states = array([episode.states[-1] for episode in episodes], dtype=float32)
+        current_temperatures = self._model.predict(current_states)[:, 0]
+
+        updated_temperatures = abs(td_errors) + self.discount_factor * current_temperatures
+
+        for episode, updated_temperature in zip(episodes, updated_temperatures.tolist()):
+            if len(episode.states) > 1:
+                self._states.append(list(episode.states[-2]))
+                self._values.append([updated_temperature])
+
+        temperatures = maximum(current_temperatures, 0.2)
+        self.temperature = float(temperatures[-1])
+
+        return temperatures[:, None]
+
+    def createModel(self, state_size):
+        """ Create the model that predicts the temperature of a state
+        """
+        if self.buckets is not None:
+            return TemperatureTable(self.buckets)
+
+        model = Sequential()
+
+        model.add(Dense(state_size, self.hidden_neurons, init='uniform', activation='tanh'))
+        model.add(Dense(self.hidden_neurons, 1, init='uniform', activation='linear'))
+
+        print('Compiling TD-error model...')
+        model.compile(loss='mse', optimizer='rmsprop')
+        print('Compiled')
+
+        return model
+
+    def getState(self):
+        state = super(AdaptiveSoftmaxLearning, self).getState()
+
+        if self._model is not None:
+            state.update(keras_state(self._model))
+
+        return state
+
+    def setState(self, state):
+        super(AdaptiveSoftmaxLearning, self).setState(state)
+
+        if 'weights0' in state:
+            if self._model is None:
+                self._model = self.createModel(state['weights0'].shape[0])
+
+            set_keras_state(self._model, state)
+
+        self._states = []
+        self._values = []
+
     def finishEpisode(self, episode):
         super(AdaptiveSoftmaxLearning, self).finishEpisode(episode)
+        self.trainTemperatureModel()
+
+    def finishEpisodes(self, episodes):
+        super(AdaptiveSoftmaxLearning, self).finishEpisodes(episodes)
+        self.trainTemperatureModel()
 
+    def trainTemperatureModel(self):
+        """ Train the TD-error model on the temperatures observed since the
+            last time it has been trained.
+        """
         if len(self._states) == 0:
             return
 
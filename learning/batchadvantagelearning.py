@@ -19,9 +19,9 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
-from .abstractlearning import *
+from .batchlearning import *
 
-class BatchAdvantageLearning(AbstractLearning):
+class BatchAdvantageLearning(BatchLearning):
     """ Advantage learning strategy, with the A-values updated at once when an
         episode is finished.
     """
@@ -41,32 +41,10 @@ class BatchAdvantageLearning(AbstractLearning):
         self.gamma = gamma
         self.kappa = kappa
 
-    def actions(self, episode):
-        """ Return the scores of the actions.
+    def update(self, advantage, other_max, reward, next_max, maximum):
+        value = maximum(other_max, advantage)
+        error = value + \
+                (reward + self.gamma * next_max - value) / self.kappa - \
+                advantage
 
-            @warning This is not a probability distribution (scores can be negative),
-                     use SoftmaxLearning or EgreedyLearning in order to get
-                     a real probability distribution !
-        """
-        return episode.values[-1], 0.0      # NOTE: The TD-error is not known yet because every computation is done in finishEpisode()
-
-    def finishEpisode(self, episode):
-        # Update the Advantage values from the end of the episode to the beginning
-        for t in range(len(episode.states) - 1, 0, -1):
-            prev_action = episode.actions[t - 1]
-            prev_reward = episode.rewards[t - 1]
-            prev_values = episode.values[t - 1]
-            next_values = episode.values[t]
-
-            advantage = prev_values[prev_action]
-            value = max(prev_values)
-            next_value = max(next_values)
-
-            error = value + \
-                    (prev_reward + self.gamma * next_value - value) / self.kappa - \
-                    advantage
-
-            prev_values[prev_action] = advantage + self.alpha * error
-
-            if prev_reward > 9.0:
-                print('big reward seen')
+        return advantage + self.alpha * error
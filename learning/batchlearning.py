@@ -0,0 +1,138 @@
+#
+# Copyright (c) 2015 Vrije Universiteit Brussel
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from numpy import array, arange, zeros, full, empty, maximum, inf, float64
+
+from .abstractlearning import *
+
+class BatchLearning(AbstractLearning):
+    """ Base class for the learning strategies that update the values of an
+        episode at once, from the end of the episode to its beginning, when
+        the episode is finished.
+
+        The update of step t uses the maximum value of step t + 1, which has
+        just been updated. Only the value of the action taken at step t + 1
+        can have changed, so the maximum over the other actions is computed
+        in advance with array operations, and only a scalar recurrence remains.
+    """
+
+    def actions(self, episode):
+        """ Return the scores of the actions.
+
+            @warning This is not a probability distribution (scores can be negative),
+                     use SoftmaxLearning or EgreedyLearning in order to get
+                     a real probability distribution !
+        """
+        return episode.values[-1], 0.0      # NOTE: The TD-error is not known yet because every computation is done in finishEpisode()
+
+    def actionsBatch(self, episodes):
+        values = array([episode.values[-1] for episode in episodes], dtype=float64)
+
+        return values.reshape((len(episodes), self.nb_actions)), zeros(shape=(len(episodes),))
+
+    def update(self, value, other_max, reward, next_max, maximum):
+        """ Return the updated value of the action taken at a time step.
+
+            @param value Value of the action taken
+            @param other_max Maximum value of the other actions at this time step
+            @param reward Reward obtained after the action has been taken
+            @param next_max Maximum value of the next time step (updated)
+            @param maximum Function used to compute a maximum. The parameters
+                           are either floats or arrays of floats, and this
+                           function is max or numpy.maximum.
+        """
+        raise NotImplementedError('The learning strategy does not implement update()')
+
+    def finishEpisode(self, episode):
+        length = len(episode.states) - 1
+
+        if length <= 0:
+            return
+
+        values, taken, other_max, rewards = self._prepare(episode, length)
+        next_max = float(values[length].max())
+
+        # Update the values from the end of the episode to the beginning
+        taken = taken.tolist()
+        other_max = other_max.tolist()
+        rewards = rewards.tolist()
+        updated = [0.0] * length
+
+        for t in range(length - 1, -1, -1):
+            updated[t] = self.update(taken[t], other_max[t], rewards[t], next_max, max)
+            next_max = max(other_max[t], updated[t])
+
+        values[arange(length), episode.actions.array()[0:length]] = updated
+
+    def finishEpisodes(self, episodes):
+        """ Update the values of several episodes at once. The episodes are
+            aligned on their last time step, so that each step of the backward
+            pass is performed for all the episodes with array operations.
+        """
+        episodes = [episode for episode in episodes if len(episode.states) > 1]
+
+        if len(episodes) <= 1:
+            for episode in episodes:
+                self.finishEpisode(episode)
+
+            return
+
+        lengths = [len(episode.states) - 1 for episode in episodes]
+        width = max(lengths)
+
+        taken = zeros(shape=(len(episodes), width))
+        other_max = full((len(episodes), width), -inf)
+        rewards = zeros(shape=(len(episodes), width))
+        next_max = empty(shape=(len(episodes),))
+
+        for i, (episode, length) in enumerate(zip(episodes, lengths)):
+            values, t, o, r = self._prepare(episode, length)
+
+            taken[i, width - length:] = t
+            other_max[i, width - length:] = o
+            rewards[i, width - length:] = r
+            next_max[i] = values[length].max()
+
+        # Backward pass over all the episodes. The columns before the beginning
+        # of an episode produce values that are ignored.
+        updated = empty(shape=(len(episodes), width))
+
+        for t in range(width - 1, -1, -1):
+            updated[:, t] = self.update(taken[:, t], other_max[:, t], rewards[:, t], next_max, maximum)
+            next_max = maximum(other_max[:, t], updated[:, t])
+
+        for i, (episode, length) in enumerate(zip(episodes, lengths)):
+            values = episode.values.array()
+            values[arange(length), episode.actions.array()[0:length]] = updated[i, width - length:]
+
+    def _prepare(self, episode, length):
+        """ Return the values of an episode, and for its first @p length time
+            steps the value of the action taken, the maximum value of the other
+            actions and the reward.
+        """
+        values = episode.values.array()
+        actions = episode.actions.array()[0:length]
+        rows = arange(length)
+
+        others = values[0:length].copy()
+        others[rows, actions] = -inf
+
+        return values, values[rows, actions], others.max(axis=1), episode.rewards.array()[0:length]
@@ -19,9 +19,9 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
-from .abstractlearning import *
+from .batchlearning import *
 
-class BatchQLearning(AbstractLearning):
+class BatchQLearning(BatchLearning):
     """ Q-Learning learning strategy, with the Q-values updated at once when an
         episode is finished.
     """
@@ -38,27 +38,7 @@ class BatchQLearning(AbstractLearning):
         self.alpha = alpha
         self.gamma = gamma
 
-    def actions(self, episode):
-        """ Return the scores of the actions.
+    def update(self, value, other_max, reward, next_max, maximum):
+        error = reward + self.gamma * next_max - value
 
-            @warning This is not a probability distribution (scores can be negative),
-                     use SoftmaxLearning or EgreedyLearning in order to get
-                     a real probability distribution !
-        """
-        return episode.values[-1], 0.0      # NOTE: The TD-error is not known yet because every computation is done in finishEpisode()
-
-    def finishEpisode(self, episode):
-        # Update the Q-values from the end of the episode to the beginning
-        for t in range(len(episode.states) - 1, 0, -1):
-            prev_action = episode.actions[t - 1]
-            prev_reward = episode.rewards[t - 1]
-            prev_values = episode.values[t - 1]
-            next_values = episode.values[t]
-
-            Q = prev_values[prev_action]
-            error = prev_reward + self.gamma * max(next_values) - Q
-
-            prev_values[prev_action] = Q + self.alpha * error
-
-            if prev_reward > 9.0:
-                print('big reward seen')
+        return value + self.alpha * error
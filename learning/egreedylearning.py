@@ -19,9 +19,10 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
-import random
+from numpy import asarray, arange, full, float64
 
 from .abstractlearning import *
+from serialization import *
 
 class EGreedyLearning(AbstractLearning):
     """ E-Greedy action selection
@@ -40,22 +41,40 @@ class EGreedyLearning(AbstractLearning):
         self.epsilon = epsilon
 
     def actions(self, episode):
-        # The best action has a probability 1-epsilon to be taken, the others share
-        # a probability of epsilon
-        actions, error = self.learning.actions(episode)
+        values, error = self.learning.actions(episode)
 
-        best_index = 0
-        best_proba = -1000000.0
+        return self.probabilities(values), error
 
-        for index, a in enumerate(actions):
-            if a > best_proba:
-                best_proba = a
-                best_index = index
+    def actionsBatch(self, episodes):
+        values, errors = self.learning.actionsBatch(episodes)
 
-        actions = [self.epsilon / (self.nb_actions - 1) for a in actions]
-        actions[best_index] = 1.0 - self.epsilon
+        return self.probabilities(values), errors
 
-        return actions, error
+    def probabilities(self, values):
+        """ Return the probabilities of the actions for a row of values, or for
+            each row of a matrix of values. The best action has a probability
+            1-epsilon to be taken, the others share a probability of epsilon.
+        """
+        values = asarray(values, dtype=float64)
+        best = values.argmax(axis=-1)
+
+        probas = full(values.shape, self.epsilon / (self.nb_actions - 1))
+
+        if values.ndim == 1:
+            probas[best] = 1.0 - self.epsilon
+        else:
+            probas[arange(len(values)), best] = 1.0 - self.epsilon
+
+        return probas
+
+    def getState(self):
+        return prefixed('learning', self.learning.getState())
+
+    def setState(self, state):
+        self.learning.setState(unprefixed('learning', state))
 
     def finishEpisode(self, episode):
         self.learning.finishEpisode(episode)
+
+    def finishEpisodes(self, episodes):
+        self.learning.finishEpisodes(episodes)
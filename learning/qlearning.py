@@ -19,6 +19,8 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
+from numpy import array, zeros, float64
+
 from .abstractlearning import *
 
 class QLearning(AbstractLearning):
@@ -59,3 +61,27 @@ class QLearning(AbstractLearning):
 
         # Values of the actions
         return episode.values[-1], error
+
+    def actionsBatch(self, episodes):
+        """ Batched version of actions(). The TD errors of all the episodes are
+            computed with array operations, only the reads and writes of the
+            Q-values in the episodes being done one episode at a time.
+        """
+        errors = zeros(shape=(len(episodes),), dtype=float64)
+        updated = [i for i, episode in enumerate(episodes) if len(episode.actions) > 0]
+
+        if len(updated) > 0:
+            # Last two rows of values, and last action and reward, of the episodes to update
+            values = [episodes[i].values.array()[-2:] for i in updated]
+            actions = array([episodes[i].actions.array()[-1] for i in updated])
+            rewards = array([episodes[i].rewards.array()[-1] for i in updated], dtype=float64)
+
+            Q = array([v[0, action] for v, action in zip(values, actions)])
+            error = rewards + self.gamma * array([v[1] for v in values]).max(axis=1) - Q
+
+            for v, action, q in zip(values, actions, (Q + self.alpha * error).tolist()):
+                v[0, action] = q
+
+            errors[updated] = error
+
+        return array([episode.values[-1] for episode in episodes], dtype=float64), errors
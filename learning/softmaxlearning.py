@@ -19,19 +19,23 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
-import math
+from numpy import array, asarray, exp, float64
 
 from .abstractlearning import *
+from serialization import *
 
-def _bounded_exp(x):
-    """ Exponential with clamping of big and small X values
+def softmax(values, temperature):
+    """ Softmax distribution of each row of @p values. The maximum of each row
+        is subtracted before the exponentials are computed (log-sum-exp trick),
+        so that large values or small temperatures do not overflow.
+
+        @param values Array of values, or of rows of values
+        @param temperature Temperature, or column of temperatures (one per row)
     """
-    if x < -699:
-        return 1e-305
-    elif x > 699:
-        return 1e304
-    else:
-        return math.exp(x)
+    scaled = asarray(values, dtype=float64) / temperature
+    scaled = exp(scaled - scaled.max(axis=-1, keepdims=True))
+
+    return scaled / scaled.sum(axis=-1, keepdims=True)
 
 class SoftmaxLearning(AbstractLearning):
     """ Softmax action selection
@@ -53,11 +57,13 @@ class SoftmaxLearning(AbstractLearning):
         values, error = self.learning.actions(episode)
         self.adjustTemperature(episode, error)
 
-        # Exponentials
-        vals = [_bounded_exp(v / self.temperature) for v in values]
+        return softmax(values, self.temperature), error
+
+    def actionsBatch(self, episodes):
+        values, errors = self.learning.actionsBatch(episodes)
+        temperatures = self.adjustTemperatures(episodes, errors)
 
-        # Normalized to a softmax distribution
-        return [v / sum(vals) for v in vals], error
+        return softmax(values, temperatures), errors
 
     def adjustTemperature(self, episode, td_error):
         """ Dynamically adjust the Softmax temperature based on an episode (that
@@ -65,5 +71,26 @@ class SoftmaxLearning(AbstractLearning):
         """
         pass
 
+    def adjustTemperatures(self, episodes, td_errors):
+        """ Batched version of adjustTemperature().
+
+            @return The temperature to use for each episode, as a column
+                    array, or a single temperature shared by all the episodes
+        """
+        return self.temperature
+
+    def getState(self):
+        state = prefixed('learning', self.learning.getState())
+        state['temperature'] = array(self.temperature)
+
+        return state
+
+    def setState(self, state):
+        self.learning.setState(unprefixed('learning', state))
+        self.temperature = float(state['temperature'])
+
     def finishEpisode(self, episode):
         self.learning.finishEpisode(episode)
+
+    def finishEpisodes(self, episodes):
+        self.learning.finishEpisodes(episodes)
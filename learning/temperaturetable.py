@@ -0,0 +1,85 @@
+#
+# Copyright (c) 2015 Vrije Universiteit Brussel
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from numpy import array, zeros, floor, int64, float32
+from numpy.random import RandomState
+
+class TemperatureTable(object):
+    """ Hashed table of temperatures, used by AdaptiveSoftmaxLearning instead
+        of a Keras perceptron. The states are quantized and hashed to one of
+        a fixed number of buckets, so that predicting or updating the
+        temperature of a state is O(1) and does not depend on the number of
+        states visited.
+
+        The methods used by AdaptiveSoftmaxLearning (predict, fit, get_weights
+        and set_weights) have the same signature as the Keras ones.
+    """
+
+    def __init__(self, buckets, resolution=0.1, learning_rate=0.2):
+        """ Constructor.
+
+            @param buckets Number of temperatures stored in the table
+            @param resolution Size of the cells in which the state variables
+                              are quantized. States in the same cell share
+                              their temperature.
+            @param learning_rate Fraction of the distance to a new value that
+                                 a temperature moves at each update
+        """
+        self.resolution = resolution
+        self.learning_rate = learning_rate
+
+        self._table = zeros(shape=(buckets,), dtype=float32)
+        self._multipliers = None        # Random odd numbers used to hash the quantized states
+
+    def predict(self, states):
+        """ Return the temperatures of a matrix of states, as a column
+        """
+        return self._table[self._buckets(states)][:, None]
+
+    def fit(self, states, values, **kwargs):
+        """ Move the temperatures of @p states towards the values of the first
+            column of @p values, one sample after the other. The keyword
+            arguments of Keras (number of epochs for instance) are ignored.
+        """
+        table = self._table
+        rate = self.learning_rate
+
+        for bucket, value in zip(self._buckets(states).tolist(), values[:, 0].tolist()):
+            table[bucket] += rate * (value - table[bucket])
+
+    def get_weights(self):
+        return [self._table]
+
+    def set_weights(self, weights):
+        self._table[:] = weights[0]
+
+    def _buckets(self, states):
+        """ Return the bucket of each row of a matrix of states
+        """
+        states = array(states, dtype=float32)
+
+        if self._multipliers is None:
+            # Always the same multipliers, so that saved tables stay valid
+            self._multipliers = RandomState(0).randint(1, 2 ** 31, size=states.shape[1]).astype(int64) * 2 + 1
+
+        cells = floor(states / self.resolution).astype(int64)
+
+        return (cells * self._multipliers).sum(axis=1) % len(self._table)
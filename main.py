@@ -22,45 +22,13 @@
 
 import sys
 import random
-import matplotlib.pyplot as plt
-
-from world.gridworld import *
-from world.polargridworld import *
-from world.pogridworld import *
-from world.tmazeworld import *
-from world.rlglueworld import *
-from world.rosworld import *
-from learning.qlearning import *
-from learning.batchqlearning import *
-from learning.advantagelearning import *
-from learning.batchadvantagelearning import *
-from learning.egreedylearning import *
-from learning.softmaxlearning import *
-from learning.adaptivesoftmaxlearning import *
-from model.discretemodel import *
-from model.grumodel import *
-from model.mut1model import *
-from model.mut2model import *
-from model.mut3model import *
-from model.lstmmodel import *
-from model.clstmmodel import *
-from model.kerasnnetmodel import *
-from model.fannnnetmodel import *
-from texplore.texploremodel import *
-
-try:
-    import std_msgs
-except ImportError:
-    pass
-
-try:
-    import theano
-
-    theano.config.allow_gc = False
-    theano.config.linker = 'cvm'
-    theano.config.openmp = True
-except ImportError:
-    print('Theano not installed, several nnet-based models will not be usable')
+import numpy.random
+
+from registry import *
+from world.profiler import *
+from world.replaybuffer import *
+from world.episodelog import *
+from world.checkpoint import *
 
 EPISODES = 5000
 MAX_TIMESTEPS = 500
@@ -70,145 +38,374 @@ DISCOUNT_FACTOR = 0.90
 HISTORY_LENGTH = 10
 HIDDEN_NEURONS = 100
 SOFTMAX_TEMP = 0.5
+VECTOR_COPIES = 16
+ONEOFN_RANGES = [10, 5]
+PROFILE_EVERY = 100
+REPLAY_CAPACITY = 50000
+REPLAY_BATCH_SIZE = 64
+REPLAY_UPDATES = 20
+EPISODE_LOG = 'episodes.log'
+CHECKPOINT_FILE = 'checkpoint.npz'
+CHECKPOINT_EVERY = 100
+TEXPLORE_ROLLOUTS = 3
+TEXPLORE_CACHE_ENTRIES = 100000
+TEXPLORE_CACHE_BYTES = 64 * 1024 * 1024
+ASYNC_DELAY = 0.0
+SEED = 1
+TEMPERATURE_BUCKETS = 65536
+BROKER_BATCH_SIZE = 32
+BROKER_LATENCY = 0.001
+TILINGS = 8
+TILES = 8
+TILE_WEIGHTS = 2 ** 18
+TILE_ALPHA = 0.5
 
-if __name__ == '__main__':
-    random.seed()
-
-    if 'gridworld' in sys.argv:
-        world = GridWorld(10, 5, (0, 2), (9, 2), (5, 2), 'stochastic' in sys.argv)
-    elif 'pogridworld' in sys.argv:
-        world = POGridWorld(10, 5, (0, 2), (9, 2), (5, 2), 'stochastic' in sys.argv)
-    elif 'polargridworld' in sys.argv:
-        world = PolarGridWorld(10, 5, (0, 2), (9, 2), (5, 2), 'stochastic' in sys.argv)
-    elif 'tmaze' in sys.argv:
-        EPISODES = 50000
-
-        world = TMazeWorld(8, 1)
-    elif 'rlglue' in sys.argv:
-        # Let the RL-Glue experiment orchestrate everything
-        MAX_TIMESTEPS = 1000000000
-        EPISODES = 1000000000
-        world = RLGlueWorld()
-    elif 'rospendulum' in sys.argv:
-        # Toy ROS experiment : inverted pendulum. The agent senses the angle
-        # and angular velocity of the pendulum, and can apply force on it.
-        MAX_TIMESTEPS = 1000
-        BATCH_SIZE = 1
-        DISOUNT_FACTOR = 0.95
-
-        subscriptions = [
-            {'path': '/vrep/jointAngle', 'type': std_msgs.msg.Float32},
-            {'path': '/vrep/jointVelocity', 'type': std_msgs.msg.Float32},
-            {'path': '/vrep/reward', 'type': std_msgs.msg.Float32},
-        ]
-        publications = [
-            {'path': '/vrep/jointTorque', 'type': std_msgs.msg.Float64, 'values': [-1.0, 0.0, 1.0]},
-            {'path': '/vrep/reset', 'type': std_msgs.msg.Int32, 'values': [1]},
-        ]
-
-        world = ROSWorld(subscriptions, publications)
-    elif 'roskhepera' in sys.argv:
-        # ROS experiment : the agent senses readings from IR sensors on a Khepera
-        # robot and controls its two motors. The goal is to reach the red cube.
-        MAX_TIMESTEPS = 1000
-        EPISODES = 10000
-        BATCH_SIZE = 1
-        DISOUNT_FACTOR = 0.98
-
-        subscriptions = [
-            {'path': '/vrep/state%i' % i, 'type': std_msgs.msg.Float32} for i in range(1, 6)
-        ] + [
-            {'path': '/vrep/reward', 'type': std_msgs.msg.Float32}
-        ]
-
-        publications = [
-            {'path': '/vrep/motorLeft', 'type': std_msgs.msg.Float32, 'values': [-5.0, 0.0, 5.0]},
-            {'path': '/vrep/motorRight', 'type': std_msgs.msg.Float32, 'values': [-5.0, 0.0, 5.0, 5.0]}, # last value : dummy reset
-        ]
-
-        world = ROSWorld(subscriptions, publications)
-    elif 'rosrealkhepera' in sys.argv:
-        # Controlling a real Khepera robot in the lab, using the roskhepera bridge
-        MAX_TIMESTEPS = 1000
-        EPISODES = 10000
-        BATCH_SIZE = 1
-        DISOUNT_FACTOR = 0.90
-
-        subscriptions = [
-            {'path': '/blueghost/leftSpeed', 'type': std_msgs.msg.Int32},
-            {'path': '/blueghost/rightSpeed', 'type': std_msgs.msg.Int32},
-            {'path': '/blueghost/ultrasonicDistanceCM2', 'type': std_msgs.msg.Int32, 'f': (lambda x: x / 400.0)}
-        ]
-
-        publications = [
-            {'path': '/blueghost/leftTorque', 'type': std_msgs.msg.Float32, 'values': [0.02, 0.0, -0.02]},
-            {'path': '/blueghost/rightTorque', 'type': std_msgs.msg.Float32, 'values': [0.02, 0.0, -0.02, 0.0]}, # last value : dummy reset
-        ]
-
-        world = ROSWorld(subscriptions, publications)
-
-    if 'discrete' in sys.argv:
-        makemodel = lambda n: DiscreteModel(n)
-    elif 'gru' in sys.argv:
-        makemodel = lambda n: GRUModel(n, HISTORY_LENGTH, HIDDEN_NEURONS)
-    elif 'mut1' in sys.argv:
-        makemodel = lambda n: MUT1Model(n, HISTORY_LENGTH, HIDDEN_NEURONS)
-    elif 'mut2' in sys.argv:
-        makemodel = lambda n: MUT2Model(n, HISTORY_LENGTH, HIDDEN_NEURONS)
-    elif 'mut3' in sys.argv:
-        makemodel = lambda n: MUT3Model(n, HISTORY_LENGTH, HIDDEN_NEURONS)
-    elif 'lstm' in sys.argv:
-        makemodel = lambda n: LSTMModel(n, HISTORY_LENGTH, HIDDEN_NEURONS)
-    elif 'clstm' in sys.argv:
-        makemodel = lambda n: CLSTMModel(n, HIDDEN_NEURONS)
-    elif 'kerasnnet' in sys.argv:
-        makemodel = lambda n: KerasNnetModel(n, HIDDEN_NEURONS)
-    elif 'fannnnet' in sys.argv:
-        makemodel = lambda n: FannNnetModel(n, HIDDEN_NEURONS)
-
-    model = makemodel(world.nb_actions())
-
-    if 'oneofn' in sys.argv:
-        world.encoding = make_encode_onehot([10, 5])
-
-    if 'qlearning' in sys.argv:
-        learning = QLearning(world.nb_actions(), 0.2, DISCOUNT_FACTOR)
-    elif 'batchqlearning' in sys.argv:
-        learning = BatchQLearning(world.nb_actions(), 0.6, DISCOUNT_FACTOR)
-    elif 'advantage' in sys.argv:
-        learning = AdvantageLearning(world.nb_actions(), 0.2, DISCOUNT_FACTOR, 0.3)
-    elif 'batchadvantage' in sys.argv:
-        learning = BatchAdvantageLearning(world.nb_actions(), 0.6, DISCOUNT_FACTOR, 0.3)
+WORLDS = Registry('world')
+VECTOR_WORLDS = Registry('vector world')
+LEARNINGS = Registry('learning algorithm')
+EXPLORATIONS = Registry('exploration strategy')
+MODELS = Registry('model')
+
+def configure_theano():
+    """ Configure Theano for the Keras-based components, if it is installed
+    """
+    try:
+        import theano
+
+        theano.config.allow_gc = False
+        theano.config.linker = 'cvm'
+        theano.config.openmp = True
+    except ImportError:
+        print('Theano not installed, several nnet-based models will not be usable')
+
+def make_rospendulum(module, argv):
+    """ Toy ROS experiment : inverted pendulum. The agent senses the angle
+        and angular velocity of the pendulum, and can apply force on it.
+    """
+    import std_msgs.msg
+
+    subscriptions = [
+        {'path': '/vrep/jointAngle', 'type': std_msgs.msg.Float32},
+        {'path': '/vrep/jointVelocity', 'type': std_msgs.msg.Float32},
+        {'path': '/vrep/reward', 'type': std_msgs.msg.Float32},
+    ]
+    publications = [
+        {'path': '/vrep/jointTorque', 'type': std_msgs.msg.Float64, 'values': [-1.0, 0.0, 1.0]},
+        {'path': '/vrep/reset', 'type': std_msgs.msg.Int32, 'values': [1]},
+    ]
+
+    return module.ROSWorld(subscriptions, publications)
+
+def make_roskhepera(module, argv):
+    """ ROS experiment : the agent senses readings from IR sensors on a Khepera
+        robot and controls its two motors. The goal is to reach the red cube.
+    """
+    import std_msgs.msg
+
+    subscriptions = [
+        {'path': '/vrep/state%i' % i, 'type': std_msgs.msg.Float32} for i in range(1, 6)
+    ] + [
+        {'path': '/vrep/reward', 'type': std_msgs.msg.Float32}
+    ]
+
+    publications = [
+        {'path': '/vrep/motorLeft', 'type': std_msgs.msg.Float32, 'values': [-5.0, 0.0, 5.0]},
+        {'path': '/vrep/motorRight', 'type': std_msgs.msg.Float32, 'values': [-5.0, 0.0, 5.0, 5.0]}, # last value : dummy reset
+    ]
+
+    return module.ROSWorld(subscriptions, publications)
+
+def make_rosrealkhepera(module, argv):
+    """ Controlling a real Khepera robot in the lab, using the roskhepera bridge
+    """
+    import std_msgs.msg
+
+    subscriptions = [
+        {'path': '/blueghost/leftSpeed', 'type': std_msgs.msg.Int32},
+        {'path': '/blueghost/rightSpeed', 'type': std_msgs.msg.Int32},
+        {'path': '/blueghost/ultrasonicDistanceCM2', 'type': std_msgs.msg.Int32, 'f': (lambda x: x / 400.0)}
+    ]
+
+    publications = [
+        {'path': '/blueghost/leftTorque', 'type': std_msgs.msg.Float32, 'values': [0.02, 0.0, -0.02]},
+        {'path': '/blueghost/rightTorque', 'type': std_msgs.msg.Float32, 'values': [0.02, 0.0, -0.02, 0.0]}, # last value : dummy reset
+    ]
+
+    return module.ROSWorld(subscriptions, publications)
+
+# Worlds. The parameters override the default parameters of the run.
+WORLDS.register('gridworld', 'world.gridworld', lambda m, argv: m.GridWorld(10, 5, (0, 2), (9, 2), (5, 2), 'stochastic' in argv))
+WORLDS.register('pogridworld', 'world.pogridworld', lambda m, argv: m.POGridWorld(10, 5, (0, 2), (9, 2), (5, 2), 'stochastic' in argv))
+WORLDS.register('polargridworld', 'world.polargridworld', lambda m, argv: m.PolarGridWorld(10, 5, (0, 2), (9, 2), (5, 2), 'stochastic' in argv))
+WORLDS.register('tmaze', 'world.tmazeworld', lambda m, argv: m.TMazeWorld(8, 1), episodes=50000)
+
+# Let the RL-Glue experiment orchestrate everything. These worlds are scalar,
+# they cannot be copied in a vector world.
+WORLDS.register('rlglue', 'world.rlglueworld', lambda m, argv: m.RLGlueWorld(), max_timesteps=1000000000, episodes=1000000000, scalar=True)
+WORLDS.register('rospendulum', 'world.rosworld', make_rospendulum, max_timesteps=1000, batch_size=1, discount_factor=0.95, scalar=True)
+WORLDS.register('roskhepera', 'world.rosworld', make_roskhepera, max_timesteps=1000, episodes=10000, batch_size=1, discount_factor=0.98, scalar=True)
+WORLDS.register('rosrealkhepera', 'world.rosworld', make_rosrealkhepera, max_timesteps=1000, episodes=10000, batch_size=1, discount_factor=0.90, scalar=True)
+
+# Vector worlds simulated using transition tables. The other worlds are
+# simulated by a VectorWorld made of copies of the world.
+VECTOR_WORLDS.register('gridworld', 'world.vectorgridworld', lambda m, argv, n: m.VectorGridWorld(n, 10, 5, (0, 2), (9, 2), (5, 2), 'stochastic' in argv))
+VECTOR_WORLDS.register('pogridworld', 'world.vectorpogridworld', lambda m, argv, n: m.VectorPOGridWorld(n, 10, 5, (0, 2), (9, 2), (5, 2), 'stochastic' in argv))
+VECTOR_WORLDS.register('polargridworld', 'world.vectorpolargridworld', lambda m, argv, n: m.VectorPolarGridWorld(n, 10, 5, (0, 2), (9, 2), (5, 2), 'stochastic' in argv))
+
+# Learning algorithms, created with the number of actions and the discount factor
+LEARNINGS.register('qlearning', 'learning.qlearning', lambda m, n, gamma: m.QLearning(n, 0.2, gamma))
+LEARNINGS.register('batchqlearning', 'learning.batchqlearning', lambda m, n, gamma: m.BatchQLearning(n, 0.6, gamma))
+LEARNINGS.register('advantage', 'learning.advantagelearning', lambda m, n, gamma: m.AdvantageLearning(n, 0.2, gamma, 0.3))
+LEARNINGS.register('batchadvantage', 'learning.batchadvantagelearning', lambda m, n, gamma: m.BatchAdvantageLearning(n, 0.6, gamma, 0.3))
+
+# Exploration strategies, created with the number of actions and the learning algorithm they wrap
+EXPLORATIONS.register('egreedy', 'learning.egreedylearning', lambda m, n, learning: m.EGreedyLearning(n, learning, 0.1))
+EXPLORATIONS.register('softmax', 'learning.softmaxlearning', lambda m, n, learning: m.SoftmaxLearning(n, learning, SOFTMAX_TEMP))
+EXPLORATIONS.register('adaptivesoftmax', 'learning.adaptivesoftmaxlearning', lambda m, n, learning: m.AdaptiveSoftmaxLearning(n, learning, HIDDEN_NEURONS, 0.1), theano=True)
+EXPLORATIONS.register('tableadaptivesoftmax', 'learning.adaptivesoftmaxlearning', lambda m, n, learning: m.AdaptiveSoftmaxLearning(n, learning, HIDDEN_NEURONS, 0.1, TEMPERATURE_BUCKETS))
+
+# Models, created with the number of actions, the command-line arguments and
+# the NumPy random number generator of the model
+# The models that implement samples() and learnSamples() can learn from a replay buffer
+MODELS.register('discrete', 'model.discretemodel', lambda m, n, argv, rng: m.DiscreteModel(n))
+MODELS.register('gru', 'model.grumodel', lambda m, n, argv, rng: m.GRUModel(n, HISTORY_LENGTH, HIDDEN_NEURONS, 'incremental' in argv, True, 'numpyruntime' in argv), theano=True, replay=True)
+MODELS.register('mut1', 'model.mut1model', lambda m, n, argv, rng: m.MUT1Model(n, HISTORY_LENGTH, HIDDEN_NEURONS, 'incremental' in argv, True, 'numpyruntime' in argv), theano=True, replay=True)
+MODELS.register('mut2', 'model.mut2model', lambda m, n, argv, rng: m.MUT2Model(n, HISTORY_LENGTH, HIDDEN_NEURONS, 'incremental' in argv, True, 'numpyruntime' in argv), theano=True, replay=True)
+MODELS.register('mut3', 'model.mut3model', lambda m, n, argv, rng: m.MUT3Model(n, HISTORY_LENGTH, HIDDEN_NEURONS, 'incremental' in argv, True, 'numpyruntime' in argv), theano=True, replay=True)
+MODELS.register('lstm', 'model.lstmmodel', lambda m, n, argv, rng: m.LSTMModel(n, HISTORY_LENGTH, HIDDEN_NEURONS, 'incremental' in argv, True, 'numpyruntime' in argv), theano=True, replay=True)
+MODELS.register('clstm', 'model.clstmmodel', lambda m, n, argv, rng: m.CLSTMModel(n, HIDDEN_NEURONS, HISTORY_LENGTH if 'incremental' in argv else None))
+MODELS.register('kerasnnet', 'model.kerasnnetmodel', lambda m, n, argv, rng: m.KerasNnetModel(n, HIDDEN_NEURONS), theano=True, replay=True)
+MODELS.register('fannnnet', 'model.fannnnetmodel', lambda m, n, argv, rng: m.FannNnetModel(n, HIDDEN_NEURONS), replay=True)
+MODELS.register('numpynnet', 'model.numpynnetmodel', lambda m, n, argv, rng: m.NumpyNnetModel(n, HIDDEN_NEURONS, rng=rng), replay=True)
+MODELS.register('tilecoding', 'model.tilecodingmodel', lambda m, n, argv, rng: m.TileCodingModel(n, TILINGS, TILES, TILE_WEIGHTS, TILE_ALPHA), replay=True)
+
+def configure(argv):
+    """ Build the world, model and learning algorithm described by a list of
+        command-line arguments (for instance ['gridworld', 'discrete',
+        'qlearning', 'softmax']). Only the modules of the components that
+        are used are imported.
+
+        @return A dictionary with the world, model and learning to use, and the
+                episodes, max_timesteps, batch_size and replay parameters of the run,
+                the prediction cache of TExplore, the AsyncModel and the
+                InferenceBroker wrapped in the model (or None)
+    """
+    world_name = WORLDS.find(argv)
+    model_name = MODELS.find(argv)
+    learning_name = LEARNINGS.find(argv)
+    exploration_name = EXPLORATIONS.find(argv, False)
+
+    params = {
+        'episodes': EPISODES,
+        'max_timesteps': MAX_TIMESTEPS,
+        'batch_size': BATCH_SIZE,
+        'discount_factor': DISCOUNT_FACTOR,
+        'scalar': False,
+    }
+    params.update(WORLDS.params(world_name))
+
+    if MODELS.params(model_name).get('theano') or \
+       (exploration_name is not None and EXPLORATIONS.params(exploration_name).get('theano')):
+        configure_theano()
+
+    makeworld = lambda: WORLDS.create(world_name, argv)
+
+    if 'vector' in argv and world_name in VECTOR_WORLDS.names():
+        # Simulate several copies of the world using transition tables
+        world = VECTOR_WORLDS.create(world_name, argv, VECTOR_COPIES)
+    elif 'vector' in argv and not params['scalar']:
+        # Simulate several copies of the world in lockstep
+        from world.vectorworld import VectorWorld
+
+        world = VectorWorld([makeworld() for i in range(VECTOR_COPIES)])
+    else:
+        world = makeworld()
+
+    if 'seed' in argv:
+        # Sample the actions and draw the random numbers of the components
+        # from reproducible random streams
+        from world.actionsampler import ActionSampler
+
+        sampler = ActionSampler(SEED)
+        makerng = sampler.generator
+    else:
+        sampler = None
+        makerng = lambda: numpy.random
+
+    makemodel = lambda n: MODELS.create(model_name, n, argv, makerng())
+
+    def stateranges():
+        """ Ranges of the (encoded) state variables, or None if unknown
+        """
+        if 'oneofn' in argv:
+            return [(0, 1)] * sum(ONEOFN_RANGES)
+        else:
+            return world.stateRanges()
+
+    def makevalues():
+        """ Create the model that predicts the values of the actions
+        """
+        if model_name == 'discrete' and 'dense' in argv:
+            # Store the values in a dense array indexed by the (encoded) states
+            from model.discretemodel import DiscreteModel
 
+            return DiscreteModel(world.nb_actions(), stateranges())
+
+        if model_name == 'tilecoding':
+            # Lay the tiles out over the ranges of the state variables, when known
+            from model.tilecodingmodel import TileCodingModel
+
+            return TileCodingModel(world.nb_actions(), TILINGS, TILES, TILE_WEIGHTS, TILE_ALPHA, stateranges())
+
+        return makemodel(world.nb_actions())
+
+    model = makevalues()
+
+    if 'oneofn' in argv:
+        from world.abstractworld import make_encode_onehot
+
+        world.encoding = make_encode_onehot(ONEOFN_RANGES)
+
+    learning = LEARNINGS.create(learning_name, world.nb_actions(), params['discount_factor'])
     baselearning = learning         # Learning without any wrapper
 
-    if 'egreedy' in sys.argv:
-        learning = EGreedyLearning(world.nb_actions(), learning, 0.1)
-    elif 'softmax' in sys.argv:
-        learning = SoftmaxLearning(world.nb_actions(), learning, SOFTMAX_TEMP)
-    elif 'adaptivesoftmax' in sys.argv:
-        learning = AdaptiveSoftmaxLearning(world.nb_actions(), learning, HIDDEN_NEURONS, 0.1)
+    if exploration_name is not None:
+        learning = EXPLORATIONS.create(exploration_name, world.nb_actions(), learning)
+
+    if 'replay' in argv or 'prioritized' in argv:
+        # Learn from minibatches drawn from a memory of past time steps
+        if 'texplore' in argv or not MODELS.params(model_name).get('replay'):
+            raise ValueError('The %s model cannot learn from a replay buffer' % ('texplore' if 'texplore' in argv else model_name))
+
+        replay = ReplayBuffer(REPLAY_CAPACITY, REPLAY_BATCH_SIZE, REPLAY_UPDATES, 'prioritized' in argv, rng=makerng())
+    else:
+        replay = None
+
+    if 'async' in argv:
+        # Train a copy of the model in the background while the agent acts
+        from model.asyncmodel import AsyncModel
+
+        if 'texplore' in argv:
+            raise ValueError('TExplore learns its values while acting and cannot learn asynchronously')
+
+        model = AsyncModel(model, makevalues(), replay, ASYNC_DELAY)
+        asyncmodel = model
+        replay = None
+    else:
+        asyncmodel = None
+
+    if 'broker' in argv:
+        # Predict the values requested by several threads in batches
+        from model.inferencebroker import InferenceBroker
+
+        model = InferenceBroker(model, BROKER_BATCH_SIZE, BROKER_LATENCY)
+        broker = model
+    else:
+        broker = None
+
+    if sampler is not None:
+        world.sampler = sampler
+
+    if 'profile' in argv:
+        # Print where the time goes every PROFILE_EVERY episodes
+        world.profiler = Profiler(print_summary, PROFILE_EVERY)
 
-    if 'texplore' in sys.argv:
-        BATCH_SIZE = 1
+    cache = None
+
+    if 'texplore' in argv:
+        from texplore.texploremodel import TExploreModel
+        from texplore.predictioncache import PredictionCache
+        from learning.softmaxlearning import SoftmaxLearning
+
+        params['batch_size'] = 1
+        batched = 'rollouts' in argv        # Perform the rollouts at the same time
+
+        if 'cache' in argv:
+            # Remember the transitions predicted by the model of the world
+            cache = PredictionCache(TEXPLORE_CACHE_ENTRIES, TEXPLORE_CACHE_BYTES)
 
         model = TExploreModel(
             world,
             makemodel,
             model,
             SoftmaxLearning(world.nb_actions(), baselearning, 3.0),
-            50
+            50,
+            TEXPLORE_ROLLOUTS,
+            batched,
+            cache
         )
 
+    return {
+        'world': world,
+        'model': model,
+        'learning': learning,
+        'episodes': params['episodes'],
+        'max_timesteps': params['max_timesteps'],
+        'batch_size': params['batch_size'],
+        'replay': replay,
+        'cache': cache,
+        'async': asyncmodel,
+        'broker': broker,
+    }
+
+if __name__ == '__main__':
+    random.seed(SEED if 'seed' in sys.argv else None)
+    numpy.random.seed(SEED if 'seed' in sys.argv else None)
+
+    experiment = configure(sys.argv)
+    world = experiment['world']
+    model = experiment['model']
+    learning = experiment['learning']
+    resume = 'resume' in sys.argv
+    checkpointer = None
+    start = 0
+
+    if 'checkpoint' in sys.argv or resume:
+        # Save the state of the run every CHECKPOINT_EVERY episodes
+        checkpointer = Checkpointer(CHECKPOINT_FILE, CHECKPOINT_EVERY)
+
+    if resume:
+        # Continue the run from its last checkpoint
+        start = checkpointer.load(world, model, learning, experiment['replay'])
+        print('resuming after episode %i' % start)
+
+    # Record the episodes on the disk instead of keeping them in memory
+    log = EpisodeLog(EPISODE_LOG, 'transitions' in sys.argv, resume)
+
+    if resume:
+        log.truncate(start)
+
     # Perform simulation steps
     print("running world:")
-    episodes = world.run(model, learning, EPISODES, MAX_TIMESTEPS, BATCH_SIZE) #,verbose=True)
+    world.run(
+        model,
+        learning,
+        experiment['episodes'] - start,
+        experiment['max_timesteps'],
+        experiment['batch_size'],
+        replay=experiment['replay'],
+        recorder=log,
+        checkpointer=checkpointer
+    ) #,verbose=True)
 
     print("ran world")
-    
+    log.close()
+
+    if experiment['cache'] is not None:
+        print(experiment['cache'].summary())
+
+    if experiment['async'] is not None:
+        experiment['async'].wait()
+        print(experiment['async'].summary())
+
+    if experiment['broker'] is not None:
+        print(experiment['broker'].summary())
+
     # Plot the cumulative reward of all the episodes
+    import matplotlib.pyplot as plt
+
     plt.figure()
-    plt.plot([e.cumulative_reward for e in episodes], '.')
+    plt.plot(log.column('cumulative_reward'), '.')
     plt.xlabel('Iteration')
     plt.ylabel('Cumulative reward')
     plt.savefig('rewards.pdf')
@@ -36,11 +36,56 @@ class AbstractModel(object):
         """
         raise NotImplementedError('The model does not implement learn()')
 
+    def samples(self, episode):
+        """ Return a tuple (inputs, targets) of arrays having one row per time
+            step of @p episode. Training the model to predict targets[i] from
+            inputs[i] is equivalent to learning the episode. This allows the
+            time steps of episodes to be stored in a ReplayBuffer.
+        """
+        raise NotImplementedError('The model does not implement samples()')
+
+    def learnSamples(self, inputs, targets, weights):
+        """ Update the model using a minibatch of rows returned by samples().
+
+            @param inputs Array of inputs, concatenated from several calls to samples()
+            @param targets Array of the values that the model has to associate with
+                           the inputs
+            @param weights Importance of each sample, 1 for all the samples
+                           when they are sampled uniformly
+            @return An array containing for each sample the absolute error of
+                    the model before the update
+        """
+        raise NotImplementedError('The model does not implement learnSamples()')
+
+    def getState(self):
+        """ Return a dictionary of NumPy arrays containing everything the model
+            has learned, see Checkpointer
+        """
+        raise NotImplementedError('The model does not implement getState()')
+
+    def setState(self, state):
+        """ Restore a state returned by getState()
+        """
+        raise NotImplementedError('The model does not implement setState()')
+
     def values(self, episode):
         """ Return the values associated with the last state of an episode
         """
         raise NotImplementedError('The model does not implement values()')
 
+    def historyLength(self):
+        """ Return the number of last states of an episode on which the values
+            returned by values() depend, or None if they depend on all of them
+        """
+        return 1
+
+    def valuesBatch(self, episodes):
+        """ Return a list containing the values associated with the last state
+            of each episode. Models that are able to predict several values at
+            once should override this method.
+        """
+        return [self.values(episode) for episode in episodes]
+
     def valuesForPlotting(self, episode):
         """ Return the values associated with the last state of an episode, possibly
             "faster" version used when plotting a model.
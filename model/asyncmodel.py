@@ -0,0 +1,224 @@
+#
+# Copyright (c) 2015 Vrije Universiteit Brussel
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import threading
+
+from numpy import array
+
+from .abstractmodel import *
+from world.profiler import *
+from serialization import *
+
+class AsyncModel(AbstractModel):
+    """ Model that learns in a background thread, so that the agent does not
+        stop acting while a model is being trained (on a real robot, the
+        control loop would stall).
+
+        Two copies of the model are used. The learner is trained by the
+        background thread on the episodes given to learn(). After each batch,
+        a snapshot of its state (see getState()) is published. The actor
+        predicts the values of the agent, and is replaced by the last published
+        snapshot at the first call to values() that happens at least
+        @p delay seconds after its publication. The snapshot is swapped
+        between two predictions, so that the actor never uses a partially
+        updated model.
+    """
+
+    def __init__(self, learner, actor, replay=None, delay=0.0):
+        """ Constructor.
+
+            @param learner Model trained by the background thread
+            @param actor Model of the same type as @p learner, used to predict
+                         the values. It is replaced by the snapshots of the
+                         learner, and is not trained.
+            @param replay If not None, ReplayBuffer from which the learner
+                          learns instead of learning the episodes directly.
+                          It is only used by the background thread.
+            @param delay Minimum number of seconds between the publication of a
+                         snapshot and its use by the actor
+        """
+        super(AsyncModel, self).__init__(learner.nb_actions)
+
+        self.delay = delay
+        self.published = 0              # Number of snapshots published by the learner
+        self.swapped = 0                # Number of snapshots used by the actor
+        self.delays = PhaseStats()      # Delays between the publication and the use of the snapshots
+
+        self._learner = learner
+        self._actor = actor
+        self._replay = replay
+        self._jobs = []                 # Batches of episodes not yet learned
+        self._learning = False
+        self._snapshot = None           # (state, time of publication) not yet used by the actor
+        self._error = None
+        self._condition = threading.Condition()
+
+        self._thread = threading.Thread(target=self._learn)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def learn(self, episodes):
+        """ Queue the episodes to be learned by the background thread, and
+            return immediately.
+        """
+        self._raiseError()
+
+        # The episodes are forked because run() empties them after learn()
+        with self._condition:
+            self._jobs.append([episode.fork() for episode in episodes])
+            self._condition.notify_all()
+
+    def wait(self):
+        """ Wait until all the episodes queued have been learned, and let the
+            actor use the resulting snapshot.
+        """
+        with self._condition:
+            while len(self._jobs) > 0 or self._learning:
+                self._condition.wait()
+
+        self._raiseError()
+        self._swap(True)
+
+    def getState(self):
+        self.wait()
+
+        state = self._learner.getState()
+
+        # The replay buffer is owned by the background thread
+        if self._replay is not None:
+            state.update(prefixed('replay', self._replay.getState()))
+
+        return state
+
+    def setState(self, state):
+        self.wait()
+
+        if self._replay is not None:
+            self._replay.setState(unprefixed('replay', state))
+
+        state = dict([(key, value) for key, value in state.items() if not key.startswith('replay/')])
+
+        self._learner.setState(state)
+        self._actor.setState(state)
+
+    def samples(self, episode):
+        return self._actor.samples(episode)
+
+    def values(self, episode):
+        self._swap()
+
+        return self._actor.values(episode)
+
+    def valuesBatch(self, episodes):
+        self._swap()
+
+        return self._actor.valuesBatch(episodes)
+
+    def valuesForPlotting(self, episode):
+        self._swap()
+
+        return self._actor.valuesForPlotting(episode)
+
+    def historyLength(self):
+        return self._actor.historyLength()
+
+    def stats(self):
+        """ Return a dictionary containing the number of snapshots published
+            and swapped, the number of batches waiting to be learned, and the
+            mean and p99 delay (in seconds) between the publication of a
+            snapshot and its use.
+        """
+        delays = self.delays.summary()
+
+        with self._condition:
+            pending = len(self._jobs)
+
+        return {
+            'published': self.published,
+            'swapped': self.swapped,
+            'pending': pending,
+            'mean_delay': delays['mean'],
+            'p99_delay': delays['p99'],
+        }
+
+    def summary(self):
+        """ Return a one-line description of the statistics of the model
+        """
+        return 'async model: %(published)i snapshots published, %(swapped)i used, ' \
+               '%(pending)i batches pending, delay %(mean_delay).4f s (p99 %(p99_delay).4f s)' % self.stats()
+
+    def _swap(self, force=False):
+        """ Replace the actor with the last snapshot published, if it has been
+            published at least delay seconds ago (or @p force is True)
+        """
+        snapshot = self._snapshot
+
+        if snapshot is None:
+            return
+
+        if not force and clock() - snapshot[1] < self.delay:
+            return
+
+        with self._condition:
+            if self._snapshot is snapshot:
+                self._snapshot = None
+
+        self._actor.setState(snapshot[0])
+        self.delays.add(clock() - snapshot[1])
+        self.swapped += 1
+
+    def _raiseError(self):
+        """ Raise in the calling thread the exception that stopped the learner
+        """
+        if self._error is not None:
+            raise self._error
+
+    def _learn(self):
+        """ Body of the background thread that trains the learner
+        """
+        while True:
+            with self._condition:
+                while len(self._jobs) == 0:
+                    self._condition.wait()
+
+                episodes = self._jobs.pop(0)
+                self._learning = True
+
+            try:
+                if self._replay is None:
+                    self._learner.learn(episodes)
+                else:
+                    self._replay.learn(self._learner, episodes)
+
+                # Copy the arrays, the learner keeps modifying them
+                state = dict([(key, array(value, copy=True)) for key, value in self._learner.getState().items()])
+                snapshot = (state, clock())
+            except Exception as e:
+                self._error = e
+                snapshot = None
+
+            with self._condition:
+                if snapshot is not None:
+                    self._snapshot = snapshot
+                    self.published += 1
+
+                self._learning = False
+                self._condition.notify_all()
@@ -27,37 +27,50 @@ except ImportError:
     print('clstm is not installed, CLSTMModel is therefore unavailable')
 
 from .abstractmodel import *
+from world.episode import *
+from serialization import *
 
 class CLSTMModel(AbstractModel):
     """ Associate values to sequences using an LSTM network based on the clstm library
+
+        The observations of the current episode are kept in a preallocated
+        input buffer. Every call to values() only appends the newest observation
+        of the episode to this buffer, and the buffer is refilled when a new
+        episode is seen. clstm networks always start a forward pass from an
+        empty recurrent state, so @p window can be used to bound the number of
+        observations given to the network at each time step. The network is
+        then trained on the same windows of observations.
     """
 
-    def __init__(self, nb_actions, hidden_neurons):
+    def __init__(self, nb_actions, hidden_neurons, window=None):
         """ Constructor.
 
             @param hidden_neurons Number of neurons in the hidden layer
+            @param window If not None, the values of an episode are predicted
+                          from its last @p window observations, so that the
+                          cost of a prediction does not depend on the length
+                          of the episode.
         """
         super(CLSTMModel, self).__init__(nb_actions)
 
         self.hidden_neurons = hidden_neurons
+        self.window = window
         self._values = zeros(shape=(1, 1, 1), dtype=float32)
         self._model = None
 
+        self._inputs = RingBuffer(window or MAX_EPISODE_LENGTH, float32)
+        self._episode = None        # Episode whose observations are in _inputs
+        self._consumed = 0          # Number of observations of _episode in _inputs
+
     def values(self, episode):
         # Make the prediction
         if self._model is None:
             value = [0.0] * self.nb_actions
         else:
-            timesteps = len(episode.states)
-            state_size = len(episode.states[0])
+            self.updateInputs(episode)
 
-            # Put the states of the episode in an array of the correct shape
-            data = zeros(shape=(timesteps, state_size, 1), dtype=float32)
-
-            data[:, :, 0] = episode.states
-
-            # Pass the data to the model
-            self._model.inputs.aset(data)
+            # Pass the (timestep, variable, 1) view of the buffer to the model
+            self._model.inputs.aset(self._inputs.array()[:, :, None])
             self._model.forward()
 
             # Return what the model predicted for the batch, all the variables
@@ -68,6 +81,47 @@ class CLSTMModel(AbstractModel):
 
         return value
 
+    def historyLength(self):
+        return self.window
+
+    def updateInputs(self, episode):
+        """ Put in the input buffer the observations of @p episode that have to
+            be given to the network
+        """
+        states = episode.states
+        capacity = self.window or states.capacity
+
+        if episode is self._episode and states.total == self._consumed + 1:
+            # Next observation of the current episode. The buffer forgets its
+            # oldest observation when the window is full.
+            self._inputs.append(states[-1])
+        else:
+            # New episode, or observations have been missed
+            if self._inputs.capacity != capacity:
+                self._inputs = RingBuffer(capacity, float32)
+            else:
+                self._inputs.clear()
+
+            for state in states[-capacity:]:
+                self._inputs.append(state)
+
+            self._episode = episode
+
+        self._consumed = states.total
+
+    def getState(self):
+        if self._model is None:
+            return {}
+
+        return {'network': file_state(lambda path: clstm.save_net(path, self._model))}
+
+    def setState(self, state):
+        if len(state) == 0:
+            return
+
+        self._model = load_file_state(state['network'], clstm.load_net)
+        self._episode = None
+
     def learn(self, episodes):
         state_size = len(episodes[0].states[0])
 
@@ -79,6 +133,30 @@ class CLSTMModel(AbstractModel):
                     (state_size, self.hidden_neurons, self.nb_actions)
             )
 
+        if self.window is not None:
+            data, values, mask = self.windowData(episodes, state_size)
+        else:
+            data, values, mask = self.episodeData(episodes, state_size)
+
+        # Train the model
+        print('training')
+        self._model.inputs.aset(data)
+        self._model.forward()
+
+        errors = values - self._model.outputs.array()
+
+        if mask is not None:
+            errors *= mask
+
+        self._model.d_outputs.aset(errors)
+        self._model.backward()
+        self._model.update()
+        print('done')
+
+    def episodeData(self, episodes, state_size):
+        """ Return the (timestep, variable, batch) data and values arrays used
+            to train the network on whole episodes, one episode per batch item.
+        """
         # Create an (timestep, variable, batch) array containing the states
         max_timestep = max([len(episode.states) for episode in episodes])
         data = zeros(shape=(max_timestep, state_size, len(episodes)), dtype=float32)
@@ -90,19 +168,38 @@ class CLSTMModel(AbstractModel):
 
             # episode.states has a shape of (timestep, variable), which corresponds
             # to what we want to put in the data array.
-            data[0:timesteps, :, e] = episode.states
+            data[0:timesteps, :, e] = episode.states.array()
 
             # episode.states has a shape of (timestep, action), which also corresponds
             # to the desired shape
-            values[0:timesteps, :, e] = episode.values
+            values[0:timesteps, :, e] = episode.values.array()
 
-        # Train the model
-        print('training')
-        self._model.inputs.aset(data)
-        self._model.forward()
+        return data, values, None
 
-        errors = values - self._model.outputs.array()
-        self._model.d_outputs.aset(errors)
-        self._model.backward()
-        self._model.update()
-        print('done')
+    def windowData(self, episodes, state_size):
+        """ Return the data, values and error mask arrays used to train the
+            network on the windows of observations seen by values(): one batch
+            item per time step, containing the last @p window observations up
+            to it. The sequences are aligned on their first observation, so
+            that the output of their last observation does not depend on the
+            padding after it, and only this output is trained.
+        """
+        total = sum([len(episode.states) for episode in episodes])
+        data = zeros(shape=(self.window, state_size, total), dtype=float32)
+        values = zeros(shape=(self.window, self.nb_actions, total), dtype=float32)
+        mask = zeros(shape=(self.window, 1, total), dtype=float32)
+        i = 0
+
+        for episode in episodes:
+            states = episode.states.array()
+            episode_values = episode.values.array()
+
+            for t in range(len(states)):
+                length = min(t + 1, self.window)
+
+                data[0:length, :, i] = states[t + 1 - length:t + 1]
+                values[length - 1, :, i] = episode_values[t]
+                mask[length - 1, 0, i] = 1.0
+                i += 1
+
+        return data, values, mask
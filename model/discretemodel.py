@@ -19,31 +19,156 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
+import math
+
+from numpy import zeros, array, concatenate, floor, unique, float64
+
 from .abstractmodel import *
 
 class DiscreteModel(AbstractModel):
     """ Model used for storing values associated with discrete states, with no
         function approximation.
+
+        By default, the values are stored in a dictionary and states can take
+        any value. When the range of every state variable is known, the values
+        can be stored in a dense (states, actions) array instead, which is much
+        faster to read and update.
     """
 
-    def __init__(self, nb_actions):
+    def __init__(self, nb_actions, ranges=None):
+        """ Constructor.
+
+            @param ranges None to store the values in a dictionary, or list of
+                          (min, max) tuples giving the inclusive range of each
+                          integer state variable, to store the values in a
+                          dense array.
+        """
         super(DiscreteModel, self).__init__(nb_actions)
 
         self._data = {}
+        self._table = None
+
+        if ranges is not None:
+            self._low = [low for low, high in ranges]
+            self._sizes = [high - low + 1 for low, high in ranges]
+            self._strides = [1] * len(ranges)
+
+            for i in range(len(ranges) - 2, -1, -1):
+                self._strides[i] = self._strides[i + 1] * self._sizes[i + 1]
+
+            self._table = zeros(shape=(self._strides[0] * self._sizes[0], nb_actions))
 
     def values(self, episode):
         """ Return the values of the last state of an episode
         """
-        state = episode.states[-1]
+        if self._table is not None:
+            return self._table[self.index(episode.states[-1])]
+
+        state = tuple(episode.states[-1].tolist())
+
+        return [self._data.get(state + (action,), 0.0) for action in range(self.nb_actions)]
 
-        return [self._data.get(self.key(state, action), 0.0) for action in range(self.nb_actions)]
+    def valuesBatch(self, episodes):
+        if self._table is None:
+            # Convert the last states of all the episodes to lists at once
+            states = array([episode.states[-1] for episode in episodes]).tolist()
+            actions = range(self.nb_actions)
+            get = self._data.get
+
+            return [[get(tuple(state) + (action,), 0.0) for action in actions] for state in states]
+
+        return list(self._table[[self.index(episode.states[-1]) for episode in episodes]])
 
     def learn(self, episodes):
         """ Update the model using the updated values in the episodes.
         """
+        if self._table is not None:
+            self.learnDense(episodes)
+            return
+
+        for episode in episodes:
+            states = episode.states.array().tolist()
+            actions = episode.actions.array().tolist()
+            values = episode.values.array()
+
+            for t, (state, action) in enumerate(zip(states, actions)):
+                self._data[self.key(state, action)] = float(values[t, action])
+
+    def learnDense(self, episodes):
+        """ Scatter the updated values of all the episodes in the dense array
+        """
+        states = []
+        actions = []
+        values = []
+
         for episode in episodes:
-            for state, action, values in zip(episode.states, episode.actions, episode.values):
-                self._data[self.key(state, action)] = values[action]
+            length = len(episode.actions)
+
+            if length == 0:
+                continue
+
+            states.append(episode.states.array()[0:length])
+            actions.append(episode.actions.array())
+            values.append(episode.values.array()[0:length])
+
+        if len(states) == 0:
+            return
+
+        states = concatenate(states)
+        actions = concatenate(actions)
+        values = concatenate(values)
+
+        # Index of the (state, action) pairs in the flattened array
+        offsets = floor(states + 0.5).astype(int) - self._low
+
+        if (offsets < 0).any() or (offsets >= self._sizes).any():
+            raise ValueError('DiscreteModel: state out of the ranges given to the constructor')
+
+        keys = offsets.dot(self._strides) * self.nb_actions + actions
+        targets = values[range(len(actions)), actions]
+
+        # When a pair is seen several times, the last value wins
+        keys, positions = unique(keys[::-1], return_index=True)
+
+        self._table.flat[keys] = targets[::-1][positions]
+
+    def getState(self):
+        if self._table is not None:
+            return {'table': self._table}
+
+        # Store the dictionary as a (keys, key length) array and an array of values
+        keys = list(self._data.keys())
+        length = len(keys[0]) if len(keys) > 0 else 0
+
+        return {
+            'keys': array(keys, dtype=float64).reshape((len(keys), length)),
+            'values': array([self._data[key] for key in keys], dtype=float64),
+        }
+
+    def setState(self, state):
+        if self._table is not None:
+            self._table[:] = state['table']
+            return
+
+        keys = [tuple(key) for key in state['keys'].tolist()]
+        values = state['values'].tolist()
+
+        self._data = dict(zip(keys, values))
+
+    def index(self, state):
+        """ Return the row of the dense array that corresponds to @p state
+        """
+        index = 0
+
+        for value, low, size, stride in zip(state.tolist(), self._low, self._sizes, self._strides):
+            offset = int(math.floor(value + 0.5)) - low
+
+            if offset < 0 or offset >= size:
+                raise ValueError('DiscreteModel: state out of the ranges given to the constructor')
+
+            index += offset * stride
+
+        return index
 
     def key(self, state, action):
-        return tuple(state + (action,))
\ No newline at end of file
+        return tuple(state) + (action,)
@@ -30,6 +30,7 @@ except ImportError:
         print('FANN is not installed, do not use fannnnetmodel')
 
 from .abstractmodel import *
+from serialization import *
 
 class FannNnetModel(AbstractModel):
     """ Simple perceptron with a single hidden layer (using py-FANN)
@@ -46,7 +47,7 @@ class FannNnetModel(AbstractModel):
         if self._model is None:
             value = [0.0] * self.nb_actions
         else:
-            state = episode.states[-1]
+            state = episode.states[-1].tolist()
             value = self._model.run(state)
 
         return value
@@ -56,19 +57,15 @@ class FannNnetModel(AbstractModel):
 
         # Create the model if needed
         if self._model is None:
-            self._model = libfann.neural_net()
-            self._model.create_sparse_array(1, (state_size, self.hidden_neurons, self.nb_actions))
-            self._model.randomize_weights(-0.1, 0.1)
-            self._model.set_activation_function_layer(libfann.GAUSSIAN, 1)
-            self._model.set_activation_function_layer(libfann.LINEAR, 2)
+            self._model = self.createModel(state_size)
 
         # Store the values of all the states encountered in all the episodes
         states = []
         values = []
 
         for episode in episodes:
-            states.extend(episode.states)
-            values.extend(episode.values)
+            states.extend(episode.states.array().tolist())
+            values.extend(episode.values.array().tolist())
 
         # Train for these values
         data = libfann.training_data()
@@ -76,6 +73,51 @@ class FannNnetModel(AbstractModel):
 
         self._model.train_on_data(data, 150, 50, 1e-5)
 
+    def samples(self, episode):
+        return (episode.states.array(), episode.values.array())
+
+    def learnSamples(self, inputs, targets, weights):
+        if self._model is None:
+            self._model = self.createModel(inputs.shape[1])
+
+        learning_rate = self._model.get_learning_rate()
+        errors = []
+
+        # FANN does not weight samples, scale the learning rate of each sample instead
+        for state, value, weight in zip(inputs.tolist(), targets.tolist(), weights.tolist()):
+            errors.append(max([abs(a - b) for a, b in zip(self._model.run(state), value)]))
+
+            self._model.set_learning_rate(learning_rate * weight)
+            self._model.train(state, value)
+
+        self._model.set_learning_rate(learning_rate)
+
+        return array(errors)
+
+    def getState(self):
+        if self._model is None:
+            return {}
+
+        return {'network': file_state(self._model.save)}
+
+    def setState(self, state):
+        if len(state) == 0:
+            return
+
+        self._model = libfann.neural_net()
+        load_file_state(state['network'], self._model.create_from_file)
+
+    def createModel(self, state_size):
+        """ Create the perceptron
+        """
+        model = libfann.neural_net()
+        model.create_sparse_array(1, (state_size, self.hidden_neurons, self.nb_actions))
+        model.randomize_weights(-0.1, 0.1)
+        model.set_activation_function_layer(libfann.GAUSSIAN, 1)
+        model.set_activation_function_layer(libfann.LINEAR, 2)
+
+        return model
+
     def make_data(self, data):
         """ Return an ndarray having row per element in data and one column
             per element of data[:]
@@ -33,14 +33,23 @@ class GRUModel(KerasHistoryModel):
         Units.
     """
 
-    def __init__(self, nb_actions, history_length, hidden_neurons):
-        super(GRUModel, self).__init__(nb_actions, history_length, hidden_neurons)
+    cell = 'gru'
+    activation = 'tanh'
+    inner_activation = 'tanh'
 
-    def createKerasModel(self, state_size):
+    def __init__(self, nb_actions, history_length, hidden_neurons, incremental=False, truncate=True, runtime=False):
+        super(GRUModel, self).__init__(nb_actions, history_length, hidden_neurons, incremental, truncate, runtime)
+
+    def createKerasModel(self, state_size, stateful=False):
         """ Create an LSTM-based neural network
         """
+        if stateful:
+            arguments = self.statefulArguments(state_size)
+        else:
+            arguments = {'input_dim': state_size}
+
         model = Sequential()
-        model.add(GRU(self.hidden_neurons, input_dim=state_size, activation='tanh', inner_activation='tanh'))
+        model.add(GRU(self.hidden_neurons, activation=self.activation, inner_activation=self.inner_activation, **arguments))
         model.add(Dense(self.nb_actions, activation='linear'))
 
         return model
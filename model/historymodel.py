@@ -19,40 +19,139 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
-from numpy import zeros, array, float32
+from numpy import zeros, array, concatenate, float32
 
 from .abstractmodel import *
 
 class HistoryModel(AbstractModel):
     """ Base class for all the models that associate a value with a sequence of
         observations (recurrent neural networks, etc).
+
+        By default, every prediction runs the model over the last history_length
+        observations of the episode. In incremental mode, the recurrent state
+        of the model is kept between calls to values(), and only the newest
+        observation of the episode is given to the model. The state is reset
+        when a new episode is seen.
     """
 
-    def __init__(self, nb_actions, history_length):
+    def __init__(self, nb_actions, history_length, incremental=False, truncate=True):
         """ Constructor.
 
             @param history_length The last @p history_length observations of every
                                   subsequence of observations are used to predict
                                   a value. For instance, the network may learn
                                   an application o1o2o3 -> v1, o2o3o4 -> v2, etc.
+            @param incremental True to predict values by feeding one observation
+                               at a time to the model, see resetState() and
+                               stepValues()
+            @param truncate Only used in incremental mode. If True, the values of
+                            episodes longer than @p history_length are predicted
+                            from their last @p history_length observations, as
+                            in the non-incremental mode. If False, the recurrent
+                            state keeps being carried over the whole episode.
         """
         super(HistoryModel, self).__init__(nb_actions)
 
         self.history_length = history_length
+        self.incremental = incremental
+        self.truncate = truncate
+
         self._model = None
+        self._episode = None        # Episode whose observations have been fed to the model
+        self._consumed = 0          # Number of observations of _episode fed to the model
 
     def values(self, episode):
         # Make the prediction
         if self._model is None:
             value = [0.0] * self.nb_actions
+        elif self.incremental and self.canStep(episode):
+            value = self.stepEpisode(episode)
         else:
             nb_states = min(len(episode.states), self.history_length)
-            observations = self.make_data([list(episode.states)[-nb_states:]])
+            observations = episode.states.array()[None, -nb_states:]
 
             value = self.getValues(observations)
 
         return value
 
+    def historyLength(self):
+        if self.incremental and not self.truncate:
+            return None
+
+        return self.history_length
+
+    def canStep(self, episode):
+        """ Return whether the values of the last state of @p episode can be
+            predicted exactly by feeding observations to the recurrent state
+        """
+        total = episode.states.total
+
+        if self.truncate and total > self.history_length:
+            # The model has been trained on truncated sequences of observations
+            return False
+
+        if episode is self._episode and total == self._consumed + 1:
+            # The next observation of the current episode
+            return True
+
+        # The recurrent state can be rebuilt if the episode remembers all its states
+        return total == len(episode.states)
+
+    def stepEpisode(self, episode):
+        """ Feed the new observations of @p episode to the recurrent state of
+            the model and return the values it predicts.
+        """
+        states = episode.states
+
+        if episode is not self._episode or states.total != self._consumed + 1:
+            # New episode, or observations have been missed : start again from
+            # the beginning of the episode
+            self.resetState()
+
+            for t in range(len(states) - 1):
+                self.stepValues(states[t])
+
+            self._episode = episode
+
+        self._consumed = states.total
+
+        return self.stepValues(states[-1])
+
+    def resetState(self):
+        """ Reset the recurrent state of the model, before the first observation
+            of an episode is given to stepValues()
+        """
+        raise NotImplementedError('The model does not implement resetState()')
+
+    def stepValues(self, observation):
+        """ Update the recurrent state of the model with one observation and
+            return the values predicted after it.
+        """
+        raise NotImplementedError('The model does not implement stepValues()')
+
+    def valuesBatch(self, episodes):
+        if self._model is None:
+            return [[0.0] * self.nb_actions for episode in episodes]
+
+        # Group the episodes by length of their observation sequence, so that
+        # every group can be predicted in one call
+        groups = {}
+
+        for index, episode in enumerate(episodes):
+            nb_states = min(len(episode.states), self.history_length)
+            groups.setdefault(nb_states, []).append(index)
+
+        result = [None] * len(episodes)
+
+        for nb_states, indexes in groups.items():
+            observations = self.make_data([episodes[i].states.array()[-nb_states:] for i in indexes])
+            values = self.getValuesBatch(observations)
+
+            for i, value in zip(indexes, values):
+                result[i] = value
+
+        return result
+
     def learn(self, episodes):
         state_size = len(episodes[0].states[0])
 
@@ -61,29 +160,49 @@ class HistoryModel(AbstractModel):
             self._model = self.createModel(state_size)
 
         # Create an (total states encountered, history_length, state_dim) array
-        total_length = sum([len(episode.states) for episode in episodes])
+        samples = [self.samples(episode) for episode in episodes]
 
-        data = zeros(shape=(total_length, self.history_length, state_size), dtype=float32)
-        values = []
-        i = 0
+        data = concatenate([sample[0] for sample in samples])
+        values = concatenate([sample[1] for sample in samples])
 
-        for e, episode in enumerate(episodes):
-            states = list(episode.states)
+        # Train the model
+        print('Training model')
+        self.trainModel(data, values)
+        print('done')
 
-            for t in range(len(states)):
-                # Observations t-history_length..t of the episode, and the value
-                # that this sequence has to produce
-                length = min(t + 1, self.history_length)
+        # The recurrent state has been computed with the previous weights
+        self._episode = None
 
-                data[i, 0:length, :] = states[t + 1 - length:t + 1]
-                values.append(episode.values[t])
+    def samples(self, episode):
+        states = episode.states.array()
+        data = zeros(shape=(len(states), self.history_length, states.shape[1]), dtype=float32)
 
-                i += 1
+        for t in range(len(states)):
+            # Observations t-history_length..t of the episode
+            length = min(t + 1, self.history_length)
 
-        # Train the model
-        print('Training model')
-        self.trainModel(data, self.make_data(values))
-        print('done')
+            data[t, 0:length, :] = states[t + 1 - length:t + 1]
+
+        # Values that these sequences have to produce
+        return (data, episode.values.array().astype(float32))
+
+    def learnSamples(self, inputs, targets, weights):
+        if self._model is None:
+            self._model = self.createModel(inputs.shape[2])
+
+        errors = abs(self.getValuesBatch(inputs) - targets).max(axis=1)
+
+        self.trainSamples(inputs, targets, weights)
+        self._episode = None
+
+        return errors
+
+    def trainSamples(self, data, values, weights):
+        """ Perform one training step on a minibatch of sequences, see trainModel().
+
+            @param weights Importance of each sequence
+        """
+        raise NotImplementedError('The model does not implement trainSamples()')
 
     def make_data(self, data):
         """ Return an ndarray having row per element in data and one column
@@ -0,0 +1,241 @@
+#
+# Copyright (c) 2015 Vrije Universiteit Brussel
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import threading
+
+from numpy import zeros, int64
+
+from .abstractmodel import *
+from world.profiler import *
+
+class _Request(object):
+    """ Values requested for the last state of an episode
+    """
+
+    def __init__(self, episode):
+        self.episode = episode
+        self.thread = threading.current_thread().ident
+        self.time = clock()
+        self.value = None
+        self.error = None
+        self.done = threading.Event()
+
+    def result(self):
+        """ Wait until the values have been predicted and return them
+        """
+        self.done.wait()
+
+        if self.error is not None:
+            raise self.error
+
+        return self.value
+
+class InferenceBroker(AbstractModel):
+    """ Model that groups the value requests of several threads into batched
+        predictions of another model. This allows agents that share a model
+        (RLGlueWorld or ROSWorld agents running in different threads for
+        instance) to use one batched forward pass instead of many predictions
+        of a single state.
+
+        A background thread waits for requests. When one arrives, it waits
+        until max_batch_size requests are pending, every thread that has
+        already used the broker has a pending request, or the oldest request
+        has been pending for max_latency seconds. It then predicts all of
+        them with one call to valuesBatch() of the model and wakes the
+        callers up. A single thread therefore never waits for max_latency.
+
+        The other methods of the model (learn, getState, etc) are forwarded
+        to it, and never run at the same time as a prediction.
+    """
+
+    def __init__(self, model, max_batch_size=32, max_latency=0.001):
+        """ Constructor.
+
+            @param model Model whose values are predicted
+            @param max_batch_size Maximum number of states predicted at once
+            @param max_latency Maximum number of seconds a request waits for
+                               other requests before being predicted
+        """
+        super(InferenceBroker, self).__init__(model.nb_actions)
+
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+
+        self.batches = zeros(shape=(max_batch_size + 1,), dtype=int64)   # Number of batches of each size
+        self.depths = PhaseStats()          # Number of requests pending when a batch is started
+        self.max_depth = 0
+        self.latencies = PhaseStats()       # Time spent by the requests waiting for their batch
+        self.predictions = PhaseStats()     # Duration of the batched predictions
+
+        self._pending = []
+        self._clients = set()               # Threads that have submitted requests
+        self._condition = threading.Condition()
+        self._lock = threading.Lock()       # Serializes the calls to the model
+
+        self._thread = threading.Thread(target=self._serve)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def submit(self, episode):
+        """ Request the values of the last state of @p episode, and return
+            immediately. The episode must not be modified until the values
+            have been predicted.
+
+            @return An object whose result() method waits for the values and
+                    returns them
+        """
+        return self._submit([episode])[0]
+
+    def values(self, episode):
+        return self.submit(episode).result()
+
+    def valuesBatch(self, episodes):
+        requests = self._submit(episodes)
+
+        return [request.result() for request in requests]
+
+    def valuesForPlotting(self, episode):
+        with self._lock:
+            return self.model.valuesForPlotting(episode)
+
+    def historyLength(self):
+        return self.model.historyLength()
+
+    def learn(self, episodes):
+        with self._lock:
+            self.model.learn(episodes)
+
+    def samples(self, episode):
+        with self._lock:
+            return self.model.samples(episode)
+
+    def learnSamples(self, inputs, targets, weights):
+        with self._lock:
+            return self.model.learnSamples(inputs, targets, weights)
+
+    def getState(self):
+        with self._lock:
+            return self.model.getState()
+
+    def setState(self, state):
+        with self._lock:
+            self.model.setState(state)
+
+    def stats(self):
+        """ Return a dictionary containing the number of requests and batches,
+            the mean batch size, the mean and maximum number of pending
+            requests when a batch starts, the mean and p99 latency added to
+            the requests, and the mean duration of a batched prediction (in
+            seconds). The distribution of the batch sizes is in the batches
+            attribute.
+        """
+        depths = self.depths.summary()
+        latencies = self.latencies.summary()
+        predictions = self.predictions.summary()
+        nb_batches = int(self.batches.sum())
+
+        return {
+            'requests': latencies['calls'],
+            'batches': nb_batches,
+            'mean_batch_size': float(latencies['calls']) / max(nb_batches, 1),
+            'mean_depth': depths['mean'],
+            'max_depth': self.max_depth,
+            'mean_latency': latencies['mean'],
+            'p99_latency': latencies['p99'],
+            'mean_prediction': predictions['mean'],
+        }
+
+    def summary(self):
+        """ Return a one-line description of the statistics of the broker
+        """
+        return 'inference broker: %(requests)i requests in %(batches)i batches ' \
+               '(mean size %(mean_batch_size).1f), queue depth %(mean_depth).1f (max %(max_depth)i), ' \
+               'added latency %(mean_latency).5f s (p99 %(p99_latency).5f s), ' \
+               'prediction %(mean_prediction).5f s' % self.stats()
+
+    def _submit(self, episodes):
+        """ Queue the requests of the episodes at once, so that they can be
+            predicted in the same batch
+        """
+        requests = [_Request(episode) for episode in episodes]
+
+        with self._condition:
+            self._clients.add(threading.current_thread().ident)
+            self._pending.extend(requests)
+            self._condition.notify_all()
+
+        return requests
+
+    def _waiting(self):
+        """ True if every thread that has used the broker has a pending
+            request, so that no other request can arrive before the batch
+            is predicted
+        """
+        return len(set([request.thread for request in self._pending])) >= len(self._clients)
+
+    def _serve(self):
+        """ Body of the background thread that predicts the batches
+        """
+        while True:
+            with self._condition:
+                while len(self._pending) == 0:
+                    self._condition.wait()
+
+                # Wait for more requests until the batch is full, all the threads
+                # are waiting, or the oldest request has waited long enough
+                deadline = self._pending[0].time + self.max_latency
+
+                while len(self._pending) < self.max_batch_size and not self._waiting():
+                    remaining = deadline - clock()
+
+                    if remaining <= 0.0:
+                        break
+
+                    self._condition.wait(remaining)
+
+                depth = len(self._pending)
+                batch = self._pending[0:self.max_batch_size]
+                del self._pending[0:self.max_batch_size]
+
+            start = clock()
+
+            self.depths.add(depth)
+            self.max_depth = max(self.max_depth, depth)
+            self.batches[len(batch)] += 1
+
+            for request in batch:
+                self.latencies.add(start - request.time)
+
+            try:
+                with self._lock:
+                    values = self.model.valuesBatch([request.episode for request in batch])
+
+                for request, value in zip(batch, values):
+                    request.value = value
+            except Exception as e:
+                for request in batch:
+                    request.error = e
+
+            self.predictions.add(clock() - start)
+
+            for request in batch:
+                request.done.set()
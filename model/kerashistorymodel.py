@@ -19,25 +19,48 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
+from numpy.random import RandomState
+
 from .historymodel import *
+from .recurrentruntime import *
+from serialization import *
 
 class KerasHistoryModel(HistoryModel):
-    """ Base class for Keras-based recurrent neural networks
+    """ Base class for Keras-based recurrent neural networks.
+
+        Subclasses set the cell, activation and inner_activation attributes
+        to the type and activation functions of their recurrent layer, so
+        that the values can be predicted by a RecurrentRuntime instead of
+        Keras.
     """
+    cell = None
+    activation = 'tanh'
+    inner_activation = 'tanh'
 
-    def __init__(self, nb_actions, history_length, hidden_neurons):
+    def __init__(self, nb_actions, history_length, hidden_neurons, incremental=False, truncate=True, runtime=False):
         """ Constructor.
 
             @param hidden_neurons Number of neurons in the hidden layer
+            @param runtime True to predict the values with a NumPy
+                           RecurrentRuntime, Keras being only used for
+                           training. The weights are exported to the
+                           runtime every time the model has been trained.
         """
-        super(KerasHistoryModel, self).__init__(nb_actions, history_length)
+        super(KerasHistoryModel, self).__init__(nb_actions, history_length, incremental, truncate)
 
         self.hidden_neurons = hidden_neurons
+        self.runtime = runtime
+        self._state_size = None
+        self._stateful_model = None     # Copy of the model that keeps its state between predictions
+        self._stateful_outdated = True
+        self._runtime = None
+        self._runtime_outdated = True
 
     def createModel(self, state_size):
         """ Create an LSTM-based neural network
         """
         model = self.createKerasModel(state_size)
+        self._state_size = state_size
 
         print('Compiling model...')
         model.compile(loss='mse', optimizer='rmsprop')
@@ -45,11 +68,107 @@ class KerasHistoryModel(HistoryModel):
 
         return model
 
+    def statefulArguments(self, state_size):
+        """ Keyword arguments that make a Keras recurrent layer process one
+            observation at a time and keep its state between predictions.
+        """
+        return {'batch_input_shape': (1, 1, state_size), 'stateful': True}
+
+    def recurrentRuntime(self):
+        """ Return the RecurrentRuntime that runs the last trained weights of
+            the model, exporting them if the model has been trained since
+            the previous call
+        """
+        if self._runtime_outdated:
+            if self._runtime is None:
+                # Check once that the runtime computes what the Keras layer computes
+                observations = RandomState(0).uniform(-1.0, 1.0, size=(4, self.history_length, self._state_size))
+
+                self.checkRuntime(observations.astype(float32))
+
+            self._runtime = RecurrentRuntime(self.cell, self._model.get_weights(), self.activation, self.inner_activation)
+            self._runtime_outdated = False
+
+        return self._runtime
+
+    def checkRuntime(self, observations, tolerance=1e-4):
+        """ Compare the values predicted by a RecurrentRuntime with the ones
+            predicted by Keras, for the same weights.
+
+            @param observations (sequences, time steps, observation size) array
+            @return The largest absolute difference between the two predictions
+            @raise ValueError if the difference is larger than @p tolerance,
+                   which means that the weight order or the equations of the
+                   runtime do not match the Keras layer of the model
+        """
+        runtime = RecurrentRuntime(self.cell, self._model.get_weights(), self.activation, self.inner_activation)
+        difference = float(abs(runtime.predict(observations) - self._model.predict(observations, verbose=0)).max())
+
+        if difference > tolerance:
+            raise ValueError('The NumPy runtime of the %s layer differs from Keras by %g' % (self.cell, difference))
+
+        return difference
+
+    def resetState(self):
+        if self.runtime:
+            self.recurrentRuntime().reset()
+            return
+
+        if self._stateful_model is None:
+            self._stateful_model = self.createKerasModel(self._state_size, stateful=True)
+            self._stateful_model.compile(loss='mse', optimizer='rmsprop')
+
+        if self._stateful_outdated:
+            # Use the weights of the last trained model
+            self._stateful_model.set_weights(self._model.get_weights())
+            self._stateful_outdated = False
+
+        self._stateful_model.reset_states()
+
+    def stepValues(self, observation):
+        if self.runtime:
+            return self._runtime.step(observation)
+
+        return self._stateful_model.predict(observation[None, None, :], batch_size=1, verbose=0)[0]
+
+    def getState(self):
+        if self._model is None:
+            return {}
+
+        state = keras_state(self._model)
+        state['state_size'] = array(self._state_size)
+
+        return state
+
+    def setState(self, state):
+        if len(state) == 0:
+            return
+
+        if self._model is None:
+            self._model = self.createModel(int(state['state_size']))
+
+        set_keras_state(self._model, state)
+        self._stateful_outdated = True
+        self._runtime_outdated = True
+        self._episode = None
+
     def getValues(self, observations):
         """ Predict the value of one sequence of observations
         """
+        if self.runtime:
+            return self.recurrentRuntime().predict(observations)[0]
+
         return self._model.predict(observations, verbose=0)[0]
 
+    def getValuesBatch(self, observations):
+        """ Predict the values of several sequences of observations having the
+            same length
+        """
+        if self.runtime:
+            return self.recurrentRuntime().predict(observations)
+
+        return self._model.predict(observations, verbose=0)
+
     def trainModel(self, data, values):
         """ Train the model with data and values.
 
@@ -65,3 +184,12 @@ class KerasHistoryModel(HistoryModel):
             batch_size=10,
             nb_epoch=4
         )
+
+        self._stateful_outdated = True
+        self._runtime_outdated = True
+
+    def trainSamples(self, data, values, weights):
+        self._model.train_on_batch(data, values, sample_weight=weights)
+
+        self._stateful_outdated = True
+        self._runtime_outdated = True
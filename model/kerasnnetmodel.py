@@ -19,7 +19,7 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
-from numpy import ndarray, array, float32
+from numpy import ndarray, array, concatenate, float32
 
 try:
     from keras.models import Sequential
@@ -28,6 +28,7 @@ except ImportError:
     print('Keras is not installed, do not use kerasnnetmodel')
 
 from .abstractmodel import *
+from serialization import *
 
 class KerasNnetModel(AbstractModel):
     """ Simple perceptron with a single hidden layer (using Keras)
@@ -44,41 +45,82 @@ class KerasNnetModel(AbstractModel):
         if self._model is None:
             value = [0.0] * self.nb_actions
         else:
-            state = episode.states[-1]
-            value = self._model.predict(self.make_data([state]), verbose=0)[0]
+            state = episode.states.array()[-1:]
+            value = self._model.predict(state, verbose=0)[0]
 
         return value
 
-    def learn(self, episodes):
-        # Create the model if needed
+    def valuesBatch(self, episodes):
         if self._model is None:
-            self._model = Sequential()
+            return [[0.0] * self.nb_actions for episode in episodes]
 
-            self._model.add(Dense(self.hidden_neurons, input_dim=len(episodes[0].states[0]), activation='tanh'))
-            self._model.add(Dense(self.nb_actions, activation='linear'))
+        # Predict the values of all the last states in one call
+        states = [episode.states[-1] for episode in episodes]
 
+        return list(self._model.predict(self.make_data(states), verbose=0))
 
-            print('Compiling model...')
-            self._model.compile(loss='mse', optimizer='rmsprop')
-            print('Compiled')
+    def learn(self, episodes):
+        # Create the model if needed
+        if self._model is None:
+            self._model = self.createModel(len(episodes[0].states[0]))
 
         # Store the values of all the states encountered in all the episodes
-        states = []
-        values = []
-
-        for episode in episodes:
-            states.extend(episode.states)
-            values.extend(episode.values)
+        states = concatenate([episode.states.array() for episode in episodes])
+        values = concatenate([episode.values.array() for episode in episodes])
 
         # Train for these values
         self._model.fit(
-            self.make_data(states),
-            self.make_data(values),
+            states,
+            values,
             verbose=0,
             batch_size=20,
             nb_epoch=2
         )
 
+    def samples(self, episode):
+        return (episode.states.array(), episode.values.array())
+
+    def learnSamples(self, inputs, targets, weights):
+        if self._model is None:
+            self._model = self.createModel(inputs.shape[1])
+
+        errors = abs(self._model.predict(inputs, verbose=0) - targets).max(axis=1)
+
+        self._model.train_on_batch(inputs, targets, sample_weight=weights)
+
+        return errors
+
+    def getState(self):
+        if self._model is None:
+            return {}
+
+        return keras_state(self._model)
+
+    def setState(self, state):
+        if len(state) == 0:
+            return
+
+        if self._model is None:
+            # The first layer has one row of weights per input
+            self._model = self.createModel(state['weights0'].shape[0])
+
+        set_keras_state(self._model, state)
+
+    def createModel(self, state_size):
+        """ Create and compile the perceptron
+        """
+        model = Sequential()
+
+        model.add(Dense(self.hidden_neurons, input_dim=state_size, activation='tanh'))
+        model.add(Dense(self.nb_actions, activation='linear'))
+
+
+        print('Compiling model...')
+        model.compile(loss='mse', optimizer='rmsprop')
+        print('Compiled')
+
+        return model
+
     def make_data(self, data):
         """ Return an ndarray having row per element in data and one column
             per element of data[:]
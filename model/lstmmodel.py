@@ -33,14 +33,23 @@ class LSTMModel(KerasHistoryModel):
         made of standard perceptron-like layers and LSTM memory cells.
     """
 
-    def __init__(self, nb_actions, history_length, hidden_neurons):
-        super(LSTMModel, self).__init__(nb_actions, history_length, hidden_neurons)
+    cell = 'lstm'
+    activation = 'tanh'
+    inner_activation = 'linear'
 
-    def createKerasModel(self, state_size):
+    def __init__(self, nb_actions, history_length, hidden_neurons, incremental=False, truncate=True, runtime=False):
+        super(LSTMModel, self).__init__(nb_actions, history_length, hidden_neurons, incremental, truncate, runtime)
+
+    def createKerasModel(self, state_size, stateful=False):
         """ Create an LSTM-based neural network
         """
+        if stateful:
+            arguments = self.statefulArguments(state_size)
+        else:
+            arguments = {'input_dim': state_size}
+
         model = Sequential()
-        model.add(LSTM(self.hidden_neurons, input_dim=state_size, activation='tanh', inner_activation='linear'))
+        model.add(LSTM(self.hidden_neurons, activation=self.activation, inner_activation=self.inner_activation, **arguments))
         model.add(Dense(self.nb_actions, activation='linear'))
 
         return model
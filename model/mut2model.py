@@ -33,14 +33,23 @@ class MUT2Model(KerasHistoryModel):
         by Jozefowicz et al,  2015.
     """
 
-    def __init__(self, nb_actions, history_length, hidden_neurons):
-        super(MUT2Model, self).__init__(nb_actions, history_length, hidden_neurons)
+    cell = 'jzs2'
+    activation = 'tanh'
+    inner_activation = 'tanh'
 
-    def createKerasModel(self, state_size):
+    def __init__(self, nb_actions, history_length, hidden_neurons, incremental=False, truncate=True, runtime=False):
+        super(MUT2Model, self).__init__(nb_actions, history_length, hidden_neurons, incremental, truncate, runtime)
+
+    def createKerasModel(self, state_size, stateful=False):
         """ Create an LSTM-based neural network
         """
+        if stateful:
+            arguments = self.statefulArguments(state_size)
+        else:
+            arguments = {'input_dim': state_size}
+
         model = Sequential()
-        model.add(JZS2(state_size, self.hidden_neurons, activation='tanh', inner_activation='tanh', truncate_gradient=self.history_length))
-        model.add(Dense(self.hidden_neurons, self.nb_actions, activation='linear'))
+        model.add(JZS2(self.hidden_neurons, activation=self.activation, inner_activation=self.inner_activation, **arguments))
+        model.add(Dense(self.nb_actions, activation='linear'))
 
         return model
@@ -0,0 +1,203 @@
+#
+# Copyright (c) 2015 Vrije Universiteit Brussel
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import math
+
+import numpy.random
+
+from numpy import array, zeros, ones, concatenate, dot, tanh, sqrt, float32
+from numpy.random import Generator
+
+from .abstractmodel import *
+from serialization import *
+
+class NumpyNnetModel(AbstractModel):
+    """ Perceptron with a single tanh hidden layer and a linear output layer,
+        like KerasNnetModel, but implemented with NumPy. Predicting the values
+        of a single state costs a few microseconds and nothing has to be
+        compiled, which makes this model fast on CPU-only machines.
+
+        The weights are stored in float32 arrays, in the same order and shapes
+        as the weights of the Keras model, so that the states returned by
+        getState() are interchangeable.
+    """
+
+    def __init__(self, nb_actions, hidden_neurons, optimizer='rmsprop', learning_rate=None, batch_size=20, nb_epoch=2, rng=numpy.random):
+        """ Constructor.
+
+            @param nb_actions Number of actions (outputs of the perceptron)
+            @param hidden_neurons Number of neurons in the hidden layer
+            @param optimizer 'rmsprop' or 'sgd'
+            @param learning_rate Learning rate of the optimizer, 0.001 for
+                                 RMSprop and 0.01 for SGD if None
+            @param batch_size Number of samples per minibatch in learn()
+            @param nb_epoch Number of passes over the episodes in learn()
+            @param rng Random number generator (numpy.random.Generator instance
+                       or the numpy.random module) used to initialize the
+                       weights and to shuffle the samples
+        """
+        super(NumpyNnetModel, self).__init__(nb_actions)
+
+        if optimizer not in ('rmsprop', 'sgd'):
+            raise ValueError('Unknown optimizer %s' % optimizer)
+
+        self.hidden_neurons = hidden_neurons
+        self.optimizer = optimizer
+        self.learning_rate = learning_rate or (0.001 if optimizer == 'rmsprop' else 0.01)
+        self.batch_size = batch_size
+        self.nb_epoch = nb_epoch
+        self.rng = rng
+
+        self._weights = None            # [hidden weights, hidden biases, output weights, output biases]
+        self._caches = None             # Moving averages of the squared gradients (RMSprop)
+
+    def values(self, episode):
+        if self._weights is None:
+            return [0.0] * self.nb_actions
+
+        w1, b1, w2, b2 = self._weights
+
+        return dot(tanh(dot(episode.states[-1], w1) + b1), w2) + b2
+
+    def valuesBatch(self, episodes):
+        if self._weights is None:
+            return [[0.0] * self.nb_actions for episode in episodes]
+
+        # Predict the values of all the last states at once
+        states = array([episode.states[-1] for episode in episodes], dtype=float32)
+
+        return list(self.predict(states))
+
+    def predict(self, states):
+        """ Return the values of each row of the matrix @p states
+        """
+        w1, b1, w2, b2 = self._weights
+
+        return dot(tanh(dot(states, w1) + b1), w2) + b2
+
+    def learn(self, episodes):
+        # Store the values of all the states encountered in all the episodes
+        states = concatenate([episode.states.array() for episode in episodes])
+        values = concatenate([episode.values.array() for episode in episodes]).astype(float32)
+        weights = ones(shape=(len(states),), dtype=float32)
+
+        if self._weights is None:
+            self.createModel(states.shape[1])
+
+        # Train on shuffled minibatches
+        for epoch in range(self.nb_epoch):
+            order = self.rng.permutation(len(states))
+
+            for start in range(0, len(states), self.batch_size):
+                batch = order[start:start + self.batch_size]
+
+                self.trainBatch(states[batch], values[batch], weights[batch])
+
+    def samples(self, episode):
+        return (episode.states.array(), episode.values.array())
+
+    def learnSamples(self, inputs, targets, weights):
+        if self._weights is None:
+            self.createModel(inputs.shape[1])
+
+        errors = abs(self.predict(inputs) - targets).max(axis=1)
+
+        self.trainBatch(inputs.astype(float32), targets.astype(float32), weights.astype(float32))
+
+        return errors
+
+    def trainBatch(self, inputs, targets, weights):
+        """ Perform one gradient step on the weighted mean squared error of a
+            minibatch, using backpropagation
+        """
+        w1, b1, w2, b2 = self._weights
+
+        # Forward pass
+        hidden = tanh(dot(inputs, w1) + b1)
+        outputs = dot(hidden, w2) + b2
+
+        # Gradient of the mean (over the outputs and samples) weighted squared error
+        delta = (outputs - targets) * (weights[:, None] * (2.0 / (targets.shape[1] * len(inputs))))
+        delta_hidden = dot(delta, w2.T) * (1.0 - hidden * hidden)
+
+        gradients = [
+            dot(inputs.T, delta_hidden),
+            delta_hidden.sum(axis=0),
+            dot(hidden.T, delta),
+            delta.sum(axis=0),
+        ]
+
+        if self.optimizer == 'rmsprop':
+            for weight, cache, gradient in zip(self._weights, self._caches, gradients):
+                cache *= 0.9
+                cache += 0.1 * gradient * gradient
+                weight -= self.learning_rate * gradient / (sqrt(cache) + 1e-6)
+        else:
+            for weight, gradient in zip(self._weights, gradients):
+                weight -= self.learning_rate * gradient
+
+    def getState(self):
+        if self._weights is None:
+            return {}
+
+        state = numbered('weights', self._weights)
+        state.update(numbered('caches', self._caches))
+
+        if isinstance(self.rng, Generator):
+            # The global NumPy random state is saved by the Checkpointer
+            state['rng'] = generator_state(self.rng)
+
+        return state
+
+    def setState(self, state):
+        if len(state) == 0:
+            return
+
+        if self._weights is None:
+            # The first layer has one row of weights per input
+            self.createModel(state['weights0'].shape[0])
+
+        for i, weight in enumerate(self._weights):
+            weight[:] = state['weights%i' % i]
+
+        # The states of KerasNnetModel do not contain the RMSprop averages
+        for i, cache in enumerate(self._caches):
+            cache[:] = state.get('caches%i' % i, 0.0)
+
+        if 'rng' in state and isinstance(self.rng, Generator):
+            set_generator_state(self.rng, state['rng'])
+
+    def createModel(self, state_size):
+        """ Initialize the weights of the perceptron (Glorot uniform weights and
+            zero biases, as Keras does)
+        """
+        def glorot(inputs, outputs):
+            limit = math.sqrt(6.0 / (inputs + outputs))
+
+            return self.rng.uniform(-limit, limit, size=(inputs, outputs)).astype(float32)
+
+        self._weights = [
+            glorot(state_size, self.hidden_neurons),
+            zeros(shape=(self.hidden_neurons,), dtype=float32),
+            glorot(self.hidden_neurons, self.nb_actions),
+            zeros(shape=(self.nb_actions,), dtype=float32),
+        ]
+        self._caches = [zeros(shape=w.shape, dtype=float32) for w in self._weights]
@@ -0,0 +1,281 @@
+#
+# Copyright (c) 2015 Vrije Universiteit Brussel
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from numpy import asarray, zeros, concatenate, dot, tanh, exp, clip, float32
+
+# Names of the weights of the Keras recurrent layers, in the order of
+# get_weights(). The weights of the Dense output layer follow them.
+CELLS = {
+    'gru': ['W_z', 'U_z', 'b_z', 'W_r', 'U_r', 'b_r', 'W_h', 'U_h', 'b_h'],
+    'lstm': ['W_i', 'U_i', 'b_i', 'W_c', 'U_c', 'b_c', 'W_f', 'U_f', 'b_f', 'W_o', 'U_o', 'b_o'],
+    'jzs1': ['W_z', 'b_z', 'W_r', 'U_r', 'b_r', 'U_h', 'b_h', 'Pmat'],
+    'jzs2': ['W_z', 'U_z', 'b_z', 'U_r', 'b_r', 'W_h', 'U_h', 'b_h', 'Pmat'],
+    'jzs3': ['W_z', 'U_z', 'b_z', 'W_r', 'U_r', 'b_r', 'W_h', 'U_h', 'b_h'],
+}
+
+def _tanh(a):
+    return tanh(a, out=a)
+
+def _linear(a):
+    return a
+
+def _sigmoid(a):
+    a *= -1.0
+    exp(a, out=a)
+    a += 1.0
+    a **= -1.0
+
+    return a
+
+def _hard_sigmoid(a):
+    a *= 0.2
+    a += 0.5
+
+    return clip(a, 0.0, 1.0, out=a)
+
+ACTIVATIONS = {
+    'tanh': _tanh,
+    'linear': _linear,
+    'sigmoid': _sigmoid,
+    'hard_sigmoid': _hard_sigmoid,
+}
+
+class _State(object):
+    """ Recurrent state and preallocated temporary matrices of a batch of
+        sequences processed by a RecurrentRuntime
+    """
+
+    def __init__(self, batch_size, hidden, gates):
+        self.h = zeros(shape=(batch_size, hidden), dtype=float32)
+        self.c = zeros(shape=(batch_size, hidden), dtype=float32)          # Memory cells (LSTM)
+        self.gates = zeros(shape=(batch_size, gates * hidden), dtype=float32)
+        self.rh = zeros(shape=(batch_size, hidden), dtype=float32)
+        self.hh = zeros(shape=(batch_size, hidden), dtype=float32)
+
+    def reset(self):
+        self.h.fill(0.0)
+        self.c.fill(0.0)
+
+class RecurrentRuntime(object):
+    """ Run the recurrent networks of the KerasHistoryModel subclasses (GRU,
+        LSTM, and the JZS1 to JZS3 layers of the MUT models) with NumPy, from
+        their trained weights. This avoids the overhead of a Keras prediction
+        at every time step.
+
+        The weights are stored in preallocated float32 matrices, the input
+        weights of all the gates being concatenated so that a single product
+        projects the observations. The gate equations are computed in place.
+        Sequences of observations can be processed at once (predict()), or
+        one observation at a time, the recurrent state being kept between
+        calls (reset() and step()).
+    """
+
+    def __init__(self, cell, weights, activation='tanh', inner_activation='hard_sigmoid'):
+        """ Constructor.
+
+            @param cell Type of the recurrent layer, a key of CELLS
+            @param weights Weights of the Keras model (recurrent layer followed
+                           by a Dense layer), as returned by get_weights()
+            @param activation Name of the activation function of the layer
+            @param inner_activation Name of the activation function of its gates
+        """
+        names = CELLS[cell]
+
+        if len(weights) != len(names) + 2:
+            raise ValueError('A %s model has %i weight matrices, not %i' % (cell, len(names) + 2, len(weights)))
+
+        w = dict(zip(names, [asarray(weight, dtype=float32) for weight in weights]))
+
+        self.cell = cell
+        self.hidden = weights[-2].shape[0]
+        self.activation = ACTIVATIONS[activation]
+        self.inner_activation = ACTIVATIONS[inner_activation]
+
+        # Projection of the observations : one column block per gate
+        if cell == 'gru' or cell == 'jzs3':
+            inputs = [w['W_z'], w['W_r'], w['W_h']]
+            biases = [w['b_z'], w['b_r'], w['b_h']]
+        elif cell == 'lstm':
+            inputs = [w['W_i'], w['W_f'], w['W_c'], w['W_o']]
+            biases = [w['b_i'], w['b_f'], w['b_c'], w['b_o']]
+        elif cell == 'jzs1':
+            # b_h is added after tanh(x.Pmat), see _project()
+            inputs = [w['W_z'], w['W_r'], w['Pmat']]
+            biases = [w['b_z'], w['b_r'], zeros(shape=(self.hidden,), dtype=float32)]
+        else:
+            inputs = [w['W_z'], w['Pmat'], w['W_h']]
+            biases = [w['b_z'], w['b_r'], w['b_h']]
+
+        self._input_weights = concatenate(inputs, axis=1)
+        self._input_biases = concatenate(biases)
+        self._b_h = w.get('b_h')
+
+        # Recurrent weights, the gates that only depend on h being concatenated
+        if cell == 'gru' or cell == 'jzs2':
+            self._recurrent = concatenate([w['U_z'], w['U_r']], axis=1)
+            self._gates = 2
+        elif cell == 'lstm':
+            self._recurrent = concatenate([w['U_i'], w['U_f'], w['U_c'], w['U_o']], axis=1)
+            self._gates = 4
+        else:
+            self._recurrent = w.get('U_z')
+            self._gates = 1
+
+        self._u_r = w.get('U_r')
+        self._u_h = w.get('U_h')
+        self._output_weights = asarray(weights[-2], dtype=float32)
+        self._output_biases = asarray(weights[-1], dtype=float32)
+
+        self._state = _State(1, self.hidden, self._gates)          # State of step()
+        self._batches = {}                                         # Batch size -> _State used by predict()
+
+    def reset(self):
+        """ Reset the recurrent state used by step()
+        """
+        self._state.reset()
+
+    def step(self, observation):
+        """ Update the recurrent state with one observation and return the
+            values predicted after it
+        """
+        x = self._project(asarray(observation, dtype=float32)[None, :])
+
+        self._step(self._state, x)
+
+        return self._output(self._state)[0]
+
+    def predict(self, observations):
+        """ Return the values predicted for each sequence of a (sequences,
+            time steps, observation size) array, starting from a zero state
+        """
+        observations = asarray(observations, dtype=float32)
+        batch_size = observations.shape[0]
+
+        if batch_size not in self._batches:
+            self._batches[batch_size] = _State(batch_size, self.hidden, self._gates)
+
+        state = self._batches[batch_size]
+        state.reset()
+
+        # Project the observations of all the time steps at once
+        x = self._project(observations)
+
+        for t in range(observations.shape[1]):
+            self._step(state, x[:, t])
+
+        return self._output(state)
+
+    def _project(self, observations):
+        """ Return the input projections of all the gates for an array of
+            observations (the last axis being the observation)
+        """
+        x = dot(observations, self._input_weights)
+        x += self._input_biases
+
+        if self.cell == 'jzs1':
+            h = 2 * self.hidden
+            xh = x[..., h:]
+
+            tanh(xh, out=xh)
+            xh += self._b_h
+
+        return x
+
+    def _step(self, s, x):
+        """ Compute one time step of the recurrent layer for the state @p s
+            and the input projections @p x
+        """
+        H = self.hidden
+        h = s.h
+
+        if self.cell == 'lstm':
+            dot(h, self._recurrent, out=s.gates)
+            s.gates += x
+
+            i = s.gates[:, 0:H]
+            f = s.gates[:, H:2 * H]
+            c = s.gates[:, 2 * H:3 * H]
+            o = s.gates[:, 3 * H:]
+
+            self.inner_activation(i)
+            self.inner_activation(f)
+            self.inner_activation(o)
+            self.activation(c)
+
+            # c = f * c + i * activation(x.W_c + h.U_c)
+            s.c *= f
+            i *= c
+            s.c += i
+
+            # h = o * activation(c)
+            s.hh[:] = s.c
+            self.activation(s.hh)
+            h[:] = o
+            h *= s.hh
+            return
+
+        if self.cell == 'gru' or self.cell == 'jzs2':
+            dot(h, self._recurrent, out=s.gates)
+            s.gates += x[:, 0:2 * H]
+            self.inner_activation(s.gates)
+
+            z = s.gates[:, 0:H]
+            s.rh[:] = s.gates[:, H:]
+        else:
+            if self.cell == 'jzs1':
+                s.gates[:] = x[:, 0:H]
+            else:
+                # JZS3 : z = inner_activation(x.W_z + tanh(h).U_z + b_z)
+                tanh(h, out=s.hh)
+                dot(s.hh, self._recurrent, out=s.gates)
+                s.gates += x[:, 0:H]
+
+            self.inner_activation(s.gates)
+            z = s.gates
+
+            dot(h, self._u_r, out=s.rh)
+            s.rh += x[:, H:2 * H]
+            self.inner_activation(s.rh)
+
+        # Candidate state : activation(x.W_h + (r * h).U_h + b_h)
+        s.rh *= h
+        dot(s.rh, self._u_h, out=s.hh)
+        s.hh += x[:, 2 * H:]
+        self.activation(s.hh)
+
+        if self.cell == 'gru':
+            # h = z * h + (1 - z) * hh
+            h -= s.hh
+            h *= z
+            h += s.hh
+        else:
+            # h = hh * z + h * (1 - z)
+            s.hh -= h
+            s.hh *= z
+            h += s.hh
+
+    def _output(self, s):
+        """ Values predicted by the Dense layer from the state @p s
+        """
+        values = dot(s.h, self._output_weights)
+        values += self._output_biases
+
+        return values
@@ -0,0 +1,183 @@
+#
+# Copyright (c) 2015 Vrije Universiteit Brussel
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from numpy import array, asarray, zeros, arange, floor, repeat, unique, concatenate, add, int64, float64
+from numpy.random import RandomState
+
+from .abstractmodel import *
+
+class TileCodingModel(AbstractModel):
+    """ Linear model over a hashed tile coding of continuous states.
+
+        The state space is covered by several tilings, grids of tiles offset
+        from each other. A state activates one tile per tiling, and its values
+        are the sum of the weights of its active tiles. The tiles are hashed
+        to the rows of a fixed-size weight array, so that the memory used does
+        not grow with the number of states visited (unlike DiscreteModel for
+        continuous states), and the values of a state are computed in a few
+        array operations.
+
+        The tiles cover @p ranges, or the range of the states of the first
+        batch of episodes learned if no ranges are given. The weights are all
+        zero before the first batch, so choosing the tiles at that time loses
+        nothing. The tiles cannot be moved afterwards without losing the
+        weights, so a range seen in the first batch is widened to at least
+        @p min_width, for the variables that hardly vary in that batch. States
+        outside the ranges are still hashed to tiles.
+    """
+
+    def __init__(self, nb_actions, tilings=8, tiles=8, size=2 ** 18, alpha=0.5, ranges=None, min_width=1.0):
+        """ Constructor.
+
+            @param nb_actions Number of actions
+            @param tilings Number of tilings
+            @param tiles Number of tiles along each state variable, in the
+                         ranges of the variables
+            @param size Number of rows of the weight array
+            @param alpha Learning rate, divided by the number of tilings
+            @param ranges List of (min, max) tuples giving the range of each
+                          state variable, or None
+            @param min_width Minimum width of the range of a state variable,
+                             when the ranges are taken from the first batch
+        """
+        super(TileCodingModel, self).__init__(nb_actions)
+
+        self.tilings = tilings
+        self.tiles = tiles
+        self.alpha = alpha
+        self.min_width = min_width
+
+        self._weights = zeros(shape=(size, nb_actions), dtype=float64)
+        self._scale = None              # Tiles per unit of each state variable
+        self._origin = None             # Lower bound of each state variable
+        self._offsets = None            # (tilings, state variables) offsets of the tilings, in tiles
+        self._multipliers = None        # Random odd numbers used to hash the tiles
+        self._tiling_hashes = None      # Hash of the number of each tiling
+
+        if ranges is not None:
+            self.createTiles(array([r[0] for r in ranges], dtype=float64), array([r[1] for r in ranges], dtype=float64))
+
+    def values(self, episode):
+        if self._scale is None:
+            return [0.0] * self.nb_actions
+
+        return self._weights[self.activeTiles(episode.states[-1])].sum(axis=0)
+
+    def valuesBatch(self, episodes):
+        if self._scale is None:
+            return [[0.0] * self.nb_actions for episode in episodes]
+
+        states = array([episode.states[-1] for episode in episodes], dtype=float64)
+
+        return list(self._weights[self.activeTiles(states)].sum(axis=1))
+
+    def activeTiles(self, states):
+        """ Return the row of the weight array of the active tile of each
+            tiling, for a state (array of tilings rows) or a matrix of states
+            (array of shape (states, tilings))
+        """
+        # Coordinates of the tiles in every tiling
+        coords = (asarray(states, dtype=float64)[..., None, :] - self._origin) * self._scale + self._offsets
+
+        tiles = floor(coords).astype(int64)
+
+        # Hash the coordinates and the tiling number
+        return ((tiles * self._multipliers).sum(axis=-1) + self._tiling_hashes) % len(self._weights)
+
+    def createTiles(self, low, high):
+        """ Lay out the tilings over the box [low, high]
+        """
+        self.setTiles(low, self.tiles / (high - low).clip(1e-6, None))
+
+    def setTiles(self, origin, scale):
+        """ Lay out the tilings from the lower corner @p origin of the box that
+            they cover and their number of tiles per unit @p scale along each
+            state variable
+        """
+        dims = len(origin)
+
+        self._origin = asarray(origin, dtype=float64)
+        self._scale = asarray(scale, dtype=float64)
+
+        # Tiling i is displaced by i/tilings of a tile, times (1, 3, 5, ...) along
+        # the variables, so that the tilings are not all offset along the diagonal
+        self._offsets = (arange(self.tilings)[:, None] * (2 * arange(dims) + 1)[None, :] / float(self.tilings)) % 1.0
+
+        # Always the same multipliers, so that saved weights stay valid. The
+        # last one is used to hash the tiling numbers.
+        multipliers = RandomState(0).randint(1, 2 ** 31, size=dims + 1).astype(int64) * 2 + 1
+
+        self._multipliers = multipliers[:-1]
+        self._tiling_hashes = arange(self.tilings, dtype=int64) * multipliers[-1]
+
+    def learn(self, episodes):
+        # Store the values of all the states encountered in all the episodes
+        states = concatenate([episode.states.array() for episode in episodes])
+        values = concatenate([episode.values.array() for episode in episodes])
+
+        self.learnSamples(states, values, None)
+
+    def samples(self, episode):
+        return (episode.states.array(), episode.values.array())
+
+    def learnSamples(self, inputs, targets, weights):
+        inputs = asarray(inputs, dtype=float64)
+
+        if self._scale is None:
+            # Range of the states of the first batch, widened around its center
+            low = inputs.min(axis=0)
+            high = inputs.max(axis=0)
+            margin = (self.min_width - (high - low)).clip(0.0, None) * 0.5
+
+            self.createTiles(low - margin, high + margin)
+
+        # Semi-gradient update of the weights of the active tiles
+        tiles = self.activeTiles(inputs)
+        errors = targets - self._weights[tiles].sum(axis=1)
+        deltas = errors * (self.alpha / self.tilings)
+
+        if weights is not None:
+            deltas *= asarray(weights)[:, None]
+
+        # A tile activated by several samples moves by the mean of their updates,
+        # so that the step size does not depend on the size of the batch
+        rows = tiles.ravel()
+        _, inverse, counts = unique(rows, return_inverse=True, return_counts=True)
+
+        add.at(self._weights, rows, repeat(deltas, self.tilings, axis=0) / counts[inverse.ravel()][:, None])
+
+        return abs(errors).max(axis=1)
+
+    def getState(self):
+        if self._scale is None:
+            return {'weights': self._weights}
+
+        return {
+            'weights': self._weights,
+            'origin': self._origin,
+            'scale': self._scale,
+        }
+
+    def setState(self, state):
+        self._weights[:] = state['weights']
+
+        if 'origin' in state:
+            self.setTiles(state['origin'], state['scale'])
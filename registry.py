@@ -0,0 +1,97 @@
+#
+# Copyright (c) 2015 Vrije Universiteit Brussel
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+""" Registries of named factories for the components of an experiment (worlds,
+    learning algorithms, models). The module of a component is only imported
+    when the component is created, so that the optional dependencies of the
+    components that are not used (Keras, FANN, rospy, etc) are never loaded.
+"""
+
+import importlib
+
+class Registry(object):
+    """ Set of named factories of one kind of component
+    """
+
+    def __init__(self, kind):
+        """ Constructor.
+
+            @param kind Kind of the components (world, model, etc), used in
+                        the error messages
+        """
+        self.kind = kind
+
+        self._names = []
+        self._entries = {}
+
+    def register(self, name, module, factory, **params):
+        """ Register a component.
+
+            @param name Name of the component, as given on the command line
+            @param module Name of the module that has to be imported before
+                          the component can be created
+            @param factory Function called with the imported module followed by
+                           the arguments given to create(), and that returns
+                           a new component
+            @param params Parameters of the component, returned by params()
+        """
+        if name not in self._entries:
+            self._names.append(name)
+
+        self._entries[name] = (module, factory, params)
+
+    def names(self):
+        """ Return the names of the registered components, in registration order
+        """
+        return list(self._names)
+
+    def params(self, name):
+        """ Return the parameters given to register() for a component
+        """
+        return dict(self._entries[name][2])
+
+    def find(self, argv, required=True):
+        """ Return the name of the only component of this registry that appears
+            in the list of arguments @p argv, or None if there is none and
+            @p required is False.
+        """
+        found = [name for name in self._names if name in argv]
+
+        if len(found) > 1:
+            raise ValueError('Several %ss given: %s' % (self.kind, ', '.join(found)))
+        elif len(found) == 0:
+            if required:
+                raise ValueError('No %s given, choose one of: %s' % (self.kind, ', '.join(self._names)))
+
+            return None
+
+        return found[0]
+
+    def create(self, name, *args):
+        """ Import the module of the component @p name and create an instance
+            of it, passing @p args to its factory
+        """
+        if name not in self._entries:
+            raise ValueError('Unknown %s %s' % (self.kind, name))
+
+        module, factory, params = self._entries[name]
+
+        return factory(importlib.import_module(module), *args)
@@ -1,20 +1,7 @@
 #!/bin/bash
 TOPLEVEL="$PWD"
 
-for learning in advantage qlearning
-do
-    for stochastic in "deterministic" "stochastic"
-    do
-        for problem in "gridworld" "pogridworld" "polargridworld"
-        do
-            for model in kerasnnet lstm gru mut1
-            do
-                dirname="$stochastic/$model/$problem/$learning"
-
-                parallel -j4 --semaphore "mkdir -p \"plots/$dirname\" && cd \"plots/$dirname\" && echo \"$dirname\" && time python3 \"$TOPLEVEL/main.py\" $stochastic $problem $model $learning softmax oneofn > \"log\" 2>&1"
-            done
-        done
-    done
-done
-
-parallel --wait
+# Run the whole grid of experiments on a pool of worker processes. Launching
+# this script again resumes an interrupted sweep.
+mkdir -p plots
+python3 "$TOPLEVEL/sweep.py" "plots/results.jsonl"
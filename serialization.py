@@ -0,0 +1,128 @@
+#
+# Copyright (c) 2015 Vrije Universiteit Brussel
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+""" Helpers used by the components of an experiment (worlds, models, learning
+    algorithms) to describe their state as dictionaries of NumPy arrays, see
+    getState() and setState(). The Checkpointer of world/checkpoint.py saves
+    these dictionaries.
+"""
+
+import os
+import json
+import tempfile
+
+from numpy import array, asarray, frombuffer, uint8
+
+def prefixed(prefix, state):
+    """ Return a copy of the state dictionary @p state whose keys are prefixed
+        by @p prefix, so that the states of several components can be stored
+        in the same checkpoint
+    """
+    return dict([(prefix + '/' + key, value) for key, value in state.items()])
+
+def unprefixed(prefix, state):
+    """ Return the elements of @p state whose key starts with @p prefix, without
+        the prefix. Inverse of prefixed().
+    """
+    start = prefix + '/'
+
+    return dict([(key[len(start):], value) for key, value in state.items() if key.startswith(start)])
+
+def file_state(save):
+    """ Return an array of bytes containing the file written by @p save, a
+        function that takes a file name. Used to checkpoint objects that can
+        only be saved to files (FANN and clstm networks for instance).
+    """
+    fd, path = tempfile.mkstemp()
+    os.close(fd)
+
+    try:
+        save(path)
+
+        with open(path, 'rb') as f:
+            return frombuffer(f.read(), dtype=uint8)
+    finally:
+        os.remove(path)
+
+def load_file_state(data, load):
+    """ Write the bytes returned by file_state() to a file and return what
+        @p load (a function that takes a file name) returns for it.
+    """
+    fd, path = tempfile.mkstemp()
+    os.close(fd)
+
+    try:
+        with open(path, 'wb') as f:
+            f.write(asarray(data, dtype=uint8).tobytes())
+
+        return load(path)
+    finally:
+        os.remove(path)
+
+def numbered(name, arrays):
+    """ Return a state dictionary storing the list @p arrays under the keys
+        name0, name1, etc.
+    """
+    return dict([('%s%i' % (name, i), a) for i, a in enumerate(arrays)])
+
+def unnumbered(name, state):
+    """ Return the list of arrays stored in @p state by numbered()
+    """
+    arrays = []
+
+    while ('%s%i' % (name, len(arrays))) in state:
+        arrays.append(state['%s%i' % (name, len(arrays))])
+
+    return arrays
+
+def generator_state(generator):
+    """ Return an array describing the state of the NumPy Generator
+        @p generator, as a JSON string
+    """
+    return array(json.dumps(generator.bit_generator.state))
+
+def set_generator_state(generator, state):
+    """ Restore a state returned by generator_state()
+    """
+    generator.bit_generator.state = json.loads(str(state))
+
+def keras_state(model):
+    """ Return the state of a compiled Keras model: its weights, and the state
+        of its optimizer (the moving averages of RMSprop for instance), so
+        that training continues exactly where it stopped.
+    """
+    state = numbered('weights', model.get_weights())
+    optimizer = getattr(model, 'optimizer', None)
+
+    if optimizer is not None:
+        state.update(numbered('optimizer', optimizer.get_state()))
+
+    return state
+
+def set_keras_state(model, state):
+    """ Restore a state returned by keras_state()
+    """
+    model.set_weights(unnumbered('weights', state))
+    optimizer = unnumbered('optimizer', state)
+
+    # States saved by NumpyNnetModel do not contain a Keras optimizer state
+    if len(optimizer) > 0:
+        model.optimizer.set_state(optimizer)
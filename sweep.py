@@ -0,0 +1,199 @@
+#!/usr/bin/python3
+#
+# Copyright (c) 2015 Vrije Universiteit Brussel
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+""" Run a grid of experiments on a pool of worker processes, and store the
+    cumulative reward of every episode of every experiment in a single
+    results file.
+
+    Usage: sweep.py <results file> [number of processes]
+
+    The results file contains one JSON object per line. Experiments that are
+    already present in it are not run again, so an interrupted sweep can be
+    resumed by launching it again with the same results file.
+"""
+
+from __future__ import print_function
+import sys
+import os
+import json
+import time
+import random
+import itertools
+import multiprocessing
+
+LEARNINGS = ['advantage', 'qlearning']
+STOCHASTICS = ['deterministic', 'stochastic']
+PROBLEMS = ['gridworld', 'pogridworld', 'polargridworld']
+MODELS = ['kerasnnet', 'lstm', 'gru', 'mut1']
+OPTIONS = ['softmax', 'oneofn']
+
+def make_configs(learnings, stochastics, problems, models, options):
+    """ Return the list of configurations (lists of command-line arguments
+        understood by main.configure()) of the learning x stochastic x problem
+        x model grid.
+    """
+    return [
+        [stochastic, problem, model, learning] + options
+        for learning, stochastic, problem, model in itertools.product(learnings, stochastics, problems, models)
+    ]
+
+def config_key(config):
+    """ Name under which the results of a configuration are stored
+    """
+    return ' '.join(config)
+
+class ResultsStore(object):
+    """ Append-only file containing the results of the experiments of a sweep,
+        one JSON object per line.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        """ Return a dictionary that associates configuration keys to the
+            results stored for them
+        """
+        results = {}
+
+        if not os.path.exists(self.path):
+            return results
+
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    # Line partially written when a sweep has been interrupted
+                    continue
+
+                results[result['config']] = result
+
+        return results
+
+    def append(self, key, rewards, elapsed):
+        """ Store the cumulative rewards obtained by a configuration
+        """
+        line = json.dumps({'config': key, 'rewards': rewards, 'time': elapsed}) + '\n'
+
+        with open(self.path, 'ab+') as f:
+            # Terminate a line that may have been partially written
+            f.seek(0, os.SEEK_END)
+
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+
+                if f.read(1) != b'\n':
+                    line = '\n' + line
+
+            f.write(line.encode('utf-8'))
+
+def _init_worker():
+    """ Import main once per worker process. main.configure() imports the
+        modules of the components a configuration uses the first time they
+        are needed, and the worker keeps them for the next configurations.
+    """
+    import main
+
+def _run_config(config):
+    """ Run a configuration in a worker process and return its key, the
+        cumulative reward of each of its episodes and the time it took.
+
+        If the configuration fails, the rewards are None and the error is
+        returned instead, so that the other configurations are still run.
+    """
+    import numpy
+    import traceback
+    import main
+
+    # Worker processes are forked with the same random state, reseed them
+    random.seed()
+    numpy.random.seed()
+
+    start = time.time()
+
+    try:
+        experiment = main.configure(config)
+        episodes = experiment['world'].run(
+            experiment['model'],
+            experiment['learning'],
+            experiment['episodes'],
+            experiment['max_timesteps'],
+            experiment['batch_size'],
+            False,
+            replay=experiment['replay']
+        )
+    except Exception:
+        return config_key(config), None, time.time() - start, traceback.format_exc()
+
+    return config_key(config), [e.cumulative_reward for e in episodes], time.time() - start, None
+
+def sweep(configs, store, processes=None):
+    """ Run every configuration that has not yet been stored in @p store, on
+        a pool of @p processes worker processes (one per CPU by default).
+    """
+    done = store.load()
+    todo = [config for config in configs if config_key(config) not in done]
+
+    print('%i configurations, %i already done' % (len(configs), len(configs) - len(todo)))
+
+    if len(todo) == 0:
+        return
+
+    pool = multiprocessing.Pool(processes or multiprocessing.cpu_count(), _init_worker)
+    failed = 0
+
+    try:
+        for key, rewards, elapsed, error in pool.imap_unordered(_run_config, todo):
+            if error is not None:
+                # Not stored, the configuration is run again when the sweep is resumed
+                failed += 1
+                print('%s: failed after %.1f seconds\n%s' % (key, elapsed, error))
+                continue
+
+            store.append(key, rewards, elapsed)
+            print('%s: %i episodes in %.1f seconds' % (key, len(rewards), elapsed))
+
+        pool.close()
+    except KeyboardInterrupt:
+        pool.terminate()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+    if failed > 0:
+        print('%i configurations failed' % failed)
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    sweep(
+        make_configs(LEARNINGS, STOCHASTICS, PROBLEMS, MODELS, OPTIONS),
+        ResultsStore(sys.argv[1]),
+        processes
+    )
@@ -21,13 +21,19 @@
 
 from world.abstractworld import *
 from world.episode import *
+from serialization import *
+
+from collections import OrderedDict
+from numpy import array, float64
+
+from .predictioncache import *
 
 class ModelWorld(AbstractWorld):
     """ World that returns next states and rewards based on a model that it learns
         from samples.
     """
 
-    def __init__(self, makemodel, world):
+    def __init__(self, makemodel, world, cache=None):
         """ Create a new grid world.
 
             @param makemodel Function that creates a model. It takes a single
@@ -36,6 +42,8 @@ class ModelWorld(AbstractWorld):
             @param world "real" world to be approximated. This world will try to
                          look as close as possible to the real world. For instance,
                          it will encode its state in the same way.
+            @param cache PredictionCache used to remember the transitions
+                         predicted by the model, or None
         """
         super(ModelWorld, self).__init__()
 
@@ -43,11 +51,34 @@ class ModelWorld(AbstractWorld):
         self._model = makemodel(len(world.encoding(world.initial)) + 1)
 
         self.world = world
+        self.cache = cache
         self.reset()
 
+        self._history = None            # Model episode of the history of _history_start
+        self._history_start = None
+        self._history_actions = 0       # Number of actions of _history_start in _history
+
     def nb_actions(self):
         return self.world.nb_actions()
 
+    def actionSampler(self):
+        # Share the random stream of the "real" world, so that the rollouts
+        # are reproducible from its seed
+        return self.world.actionSampler()
+
+    def getState(self):
+        state = super(ModelWorld, self).getState()
+        state.update(prefixed('model', self._model.getState()))
+
+        return state
+
+    def setState(self, state):
+        super(ModelWorld, self).setState(state)
+        self._model.setState(unprefixed('model', state))
+
+        if self.cache is not None:
+            self.cache.clear()
+
     def reset(self):
         # Copy the initial state of the "real" world, so that random initial values
         # are handled correctly
@@ -63,7 +94,7 @@ class ModelWorld(AbstractWorld):
         self._episode.addAction(action)
 
         # Use this updated episode to predict the next state
-        values = self._model.values(self._episode)
+        values = self.predict([self._episode])[0]
         state_update = values[:-1]
         reward = values[-1]
 
@@ -77,6 +108,44 @@ class ModelWorld(AbstractWorld):
 
         return (new_state, reward, False)
 
+    def restore(self, episode):
+        # Continue a fork of the model episode of the history instead of
+        # replaying it, which would ask the model to predict every transition
+        self._episode = self.historyEpisode(episode).fork()
+        self._state = episode.states[-1]
+
+    def historyEpisode(self, episode):
+        """ Return the episode of (state, action) observations given to the
+            model for the history of @p episode, as built when replaying it.
+            The model episode is kept between calls and only the actions
+            performed since the previous call are added to it.
+
+            @note The episode returned must not be modified, use its fork()
+                  method to continue it.
+        """
+        states = episode.states.array()
+        actions = episode.actions.array()
+        first = 0
+
+        # Position in states of the state in which actions[0] has been taken
+        offset = len(states) - 1 - len(actions)
+
+        if episode is self._history_start and episode.actions.total - self._history_actions <= len(actions):
+            first = len(actions) - (episode.actions.total - self._history_actions)
+        else:
+            self._history = Episode()
+            self._history_start = episode
+
+        for i in range(max(first, -offset), len(actions)):
+            action = int(actions[i])
+
+            self._history.addState(self._make_state(tuple(states[i + offset]), action))
+            self._history.addAction(action)
+
+        self._history_actions = episode.actions.total
+
+        return self._history
+
     def performActionSupervised(self, action, target_state):
         self.performAction(action)
 
@@ -115,6 +184,52 @@ class ModelWorld(AbstractWorld):
         # Train the model on the model episodes
         self._model.learn(model_episodes)
 
+        # The predictions made by the previous model are not valid anymore
+        if self.cache is not None:
+            self.cache.clear()
+
+    def predict(self, episodes):
+        """ Return the state updates and rewards predicted for the last
+            (state, action) observation of each of the model episodes. Only the
+            predictions that are not in the cache are asked to the model, in
+            a single batched call.
+        """
+        if self.cache is None:
+            return self._model.valuesBatch(episodes)
+
+        keys = [self._cacheKey(episode) for episode in episodes]
+        result = [self.cache.get(key) for key in keys]
+        missing = OrderedDict()         # Key -> episodes having this key
+
+        for i, values in enumerate(result):
+            if values is None:
+                missing.setdefault(keys[i], []).append(i)
+
+        if len(missing) > 0:
+            # Predict each missing key once
+            predictions = self._model.valuesBatch([episodes[indexes[0]] for indexes in missing.values()])
+
+            for (key, indexes), values in zip(missing.items(), predictions):
+                values = array(values, dtype=float64)
+                self.cache.put(key, values)
+
+                for i in indexes:
+                    result[i] = values
+
+        return result
+
+    def _cacheKey(self, episode):
+        """ Key identifying the input of the model for the last observation of
+            @p episode : the observations on which the prediction depends
+        """
+        states = episode.states.array()
+        length = self._model.historyLength()
+
+        if length is not None:
+            states = states[-length:]
+
+        return states.tobytes()
+
     def _make_state(self, state, action):
         """ Make a "state" based on a real state and an action number
         """
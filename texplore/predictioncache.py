@@ -0,0 +1,117 @@
+#
+# Copyright (c) 2015 Vrije Universiteit Brussel
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from collections import OrderedDict
+
+class PredictionCache(object):
+    """ Least-recently-used cache of the predictions of a model. The keys are
+        byte strings (the raw bytes of the inputs of the model for instance)
+        and the values are NumPy arrays. The number of entries and the size
+        in bytes of the keys and values can both be bounded.
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None):
+        """ Constructor.
+
+            @param max_entries Maximum number of predictions stored, None for
+                               no limit
+            @param max_bytes Maximum size in bytes of the stored keys and
+                             values, None for no limit
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        self._entries = OrderedDict()       # Oldest entry first
+        self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """ Return the prediction associated with @p key, or None if it is not
+            in the cache
+        """
+        value = self._entries.pop(key, None)
+
+        if value is None:
+            self.misses += 1
+            return None
+
+        # Mark the entry as the most recently used one
+        self._entries[key] = value
+        self.hits += 1
+
+        return value
+
+    def put(self, key, value):
+        """ Store the prediction @p value (NumPy array) associated with @p key
+        """
+        old = self._entries.pop(key, None)
+
+        if old is not None:
+            self._bytes -= len(key) + old.nbytes
+
+        self._entries[key] = value
+        self._bytes += len(key) + value.nbytes
+
+        # Remove the least recently used entries until the cache fits in its budget
+        while (self.max_entries is not None and len(self._entries) > self.max_entries) or \
+              (self.max_bytes is not None and self._bytes > self.max_bytes and len(self._entries) > 1):
+            key, value = self._entries.popitem(last=False)
+
+            self._bytes -= len(key) + value.nbytes
+            self.evictions += 1
+
+    def clear(self):
+        """ Remove all the predictions, for instance because the model has been
+            trained and does not predict the same values anymore
+        """
+        self._entries.clear()
+        self._bytes = 0
+        self.invalidations += 1
+
+    def stats(self):
+        """ Return a dictionary containing the hits, misses, hit_rate, entries,
+            bytes, evictions and invalidations of the cache
+        """
+        lookups = self.hits + self.misses
+
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': float(self.hits) / lookups if lookups > 0 else 0.0,
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
+
+    def summary(self):
+        """ Return a one-line description of the statistics of the cache
+        """
+        return 'prediction cache: %(hits)i hits, %(misses)i misses (hit rate %(hit_rate).3f), ' \
+               '%(entries)i entries using %(bytes)i bytes, %(evictions)i evictions, ' \
+               '%(invalidations)i invalidations' % self.stats()
@@ -20,15 +20,17 @@
 # THE SOFTWARE.
 from model.abstractmodel import *
 from world.episode import *
+from serialization import *
 
 from .modelworld import *
+from .vectormodelworld import *
 
 class TExploreModel(AbstractModel):
     """ Model based on TExplore (Hester, 2013), that learns a model of the world
         and use it to produce Q or Advantage values.
     """
 
-    def __init__(self, world, makeworldmodel, model, learning, rollout_length):
+    def __init__(self, world, makeworldmodel, model, learning, rollout_length, num_rollouts=3, batched=False, cache=None):
         """ Initialize a new TExploreModel.
 
             @param world "real" world which will be approximated.
@@ -42,28 +44,65 @@ class TExploreModel(AbstractModel):
                             world, so that the values predicted by this model
                             match what the "real" learning algorithm expects.
             @param rollout_length Length of the rollouts performed by this model
+            @param num_rollouts Number of rollouts performed at every time step
+            @param batched False to perform the rollouts one after the other,
+                           the value model learning after each of them. True
+                           to perform all the rollouts at the same time, with
+                           one batched prediction per time step. The value
+                           model still learns each rollout separately, but
+                           all of them are predicted by the model that
+                           existed before the first one.
+            @param cache PredictionCache used by the model of the world to
+                         remember the transitions it predicts, or None
         """
         super(TExploreModel, self).__init__(world.nb_actions())
 
-        self._world = ModelWorld(makeworldmodel, world)
+        self._world = ModelWorld(makeworldmodel, world, cache)
+        self._vector_world = VectorModelWorld(self._world, num_rollouts) if batched else None
         self._model = model
         self._learning = learning
         self._rollout_length = rollout_length
+        self._num_rollouts = num_rollouts
 
     def values(self, episode):
-        state = episode.states[-1]
-
-        # Perform some rollouts from the current position
-        num_rollouts = 3
-        batch_size = 1
-
-        self._world.run(self._model, self._learning, num_rollouts, self._rollout_length, batch_size, False, episode)
+        if self._vector_world is None:
+            # Perform some rollouts from the current position, one after the other
+            self._world.run(self._model, self._learning, self._num_rollouts, self._rollout_length, 1, False, episode)
+        else:
+            # Perform all the rollouts at the same time
+            self._vector_world.run(
+                self._model,
+                self._learning,
+                self._num_rollouts,
+                self._rollout_length,
+                1,
+                False,
+                episode
+            )
 
         # Use the model trained by the rollouts to predict the values
         values = self._model.values(episode)
 
         return values
 
+    def getState(self):
+        state = {}
+
+        state.update(prefixed('world', self._world.getState()))
+        state.update(prefixed('values', self._model.getState()))
+        state.update(prefixed('learning', self._learning.getState()))
+
+        return state
+
+    def setState(self, state):
+        self._world.setState(unprefixed('world', state))
+        self._model.setState(unprefixed('values', state))
+        self._learning.setState(unprefixed('learning', state))
+
+    def historyLength(self):
+        # The rollouts start from the whole episode
+        return None
+
     def valuesForPlotting(self, episode):
         return self._model.valuesForPlotting(episode)
 
@@ -0,0 +1,103 @@
+#
+# Copyright (c) 2015 Vrije Universiteit Brussel
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from numpy import array, zeros, concatenate, float32
+
+from world.abstractvectorworld import *
+from world.episode import *
+
+from .modelworld import *
+
+class VectorModelWorld(AbstractVectorWorld):
+    """ Several copies of a ModelWorld, that share its model of the world. The
+        copies are stepped at the same time, and the next states and rewards
+        of all the copies are predicted in a single batched call to the model.
+        This allows TExploreModel to perform many rollouts at once.
+    """
+
+    def __init__(self, world, nb_copies):
+        """ Constructor.
+
+            @param world ModelWorld whose model is used to predict the next
+                         states and rewards
+            @param nb_copies Number of copies simulated at the same time
+        """
+        super(VectorModelWorld, self).__init__()
+
+        self.world = world
+
+        self._episodes = [None] * nb_copies     # (state, action) -> (state delta, reward) episode of each copy
+        self._states = None                     # Current state of each copy
+
+    def nb_copies(self):
+        return len(self._episodes)
+
+    def nb_actions(self):
+        return self.world.nb_actions()
+
+    def actionSampler(self):
+        # Share the random stream of the "real" world, so that the rollouts
+        # are reproducible from its seed
+        return self.world.actionSampler()
+
+    def initialState(self, index):
+        return self.world.world.encoding(self.world.world.initial)
+
+    def resetCopy(self, index):
+        self._episodes[index] = Episode()
+        self._setState(index, self.initialState(index))
+
+    def startCopy(self, index, episode):
+        self._episodes[index] = self.world.historyEpisode(episode).fork()
+        self._setState(index, episode.states[-1])
+
+    def performActions(self, indices, actions):
+        episodes = [self._episodes[index] for index in indices]
+        states = self._states[indices]
+
+        # (state, action) inputs of the model, the actions being one-hot encoded
+        onehot = zeros(shape=(len(indices), self.nb_actions()), dtype=float32)
+        onehot[range(len(indices)), actions] = 1.0
+
+        inputs = concatenate([states, onehot], axis=1)
+
+        for episode, row, action in zip(episodes, inputs, actions):
+            episode.addState(row)
+            episode.addAction(action)
+
+        # Predict the state updates and rewards of all the copies at once. The
+        # model only reads the (state, action) observations of the episodes,
+        # the predictions are not added to them.
+        values = array(self.world.predict(episodes), dtype=float)
+        next_states = states + values[:, :-1]
+        rewards = values[:, -1]
+
+        self._states[indices] = next_states
+
+        return (next_states, rewards, [False] * len(indices))
+
+    def _setState(self, index, state):
+        """ Set the current state of the copy @p index
+        """
+        if self._states is None:
+            self._states = zeros(shape=(self.nb_copies(), len(state)), dtype=float32)
+
+        self._states[index] = state
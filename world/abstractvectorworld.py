@@ -0,0 +1,267 @@
+#
+# Copyright (c) 2015 Vrije Universiteit Brussel
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from __future__ import print_function
+from numpy import asarray, minimum, maximum, float64
+
+from .abstractworld import *
+from .episode import *
+
+class AbstractVectorWorld(AbstractWorld):
+    """ Several independent copies of a world that are simulated in lockstep.
+        All the copies share the same encoding, number of actions and model,
+        so that the values of all their current states can be predicted in
+        a single batched call.
+    """
+
+    def nb_copies(self):
+        """ Return the number of copies of the world that are simulated at
+            the same time.
+        """
+        raise NotImplementedError('The world does not implement nb_copies()')
+
+    def initialState(self, index):
+        """ Return the (not encoded) initial state of the next episode of
+            the copy @p index
+        """
+        raise NotImplementedError('The world does not implement initialState()')
+
+    def resetCopy(self, index):
+        """ Reset the copy @p index of the world, see AbstractWorld.reset()
+        """
+        raise NotImplementedError('The world does not implement resetCopy()')
+
+    def startCopy(self, index, episode):
+        """ Reset the copy @p index so that it is in the state reached at the
+            end of @p episode, see the start_episode parameter of run()
+        """
+        raise NotImplementedError('The world cannot start from an existing episode')
+
+    def performActions(self, indices, actions):
+        """ Perform one action on each of the copies listed in @p indices and
+            return a tuple (states, rewards, finished) of sequences having one
+            element per copy.
+
+            @note The states returned must not be encoded. AbstractVectorWorld
+                  takes care of the encoding when needed.
+        """
+        raise NotImplementedError('The world does not implement performActions()')
+
+    def run(self, model, learning, num_episodes, max_episode_length, batch_size, verbose=True, start_episode=None, replay=None, recorder=None, checkpointer=None):
+        """ Simulate one agent in each copy of this world. The copies are stepped
+            at the same time, and a new episode is started on a copy as soon
+            as its previous episode is finished.
+
+            The parameters have the same meaning as in AbstractWorld.run(),
+            @p num_episodes being the total number of episodes simulated over
+            all the copies. When a checkpoint is taken, the episodes in
+            progress on the other copies are not saved, they are started again
+            when the run is resumed.
+
+            @return A list of Episode objects, in the order in which they finished
+                    (empty if a recorder is used)
+        """
+        episodes = []
+        learn_episodes = []
+        current = [None] * self.nb_copies()
+        steps = [0] * self.nb_copies()
+        started = 0
+        completed = 0
+        sampler = self.actionSampler()
+        profiler = self.beginProfiling()
+
+        try:
+            # Start one episode on every copy (or less if only a few episodes are needed)
+            active = list(range(min(self.nb_copies(), num_episodes)))
+
+            for index in active:
+                current[index] = self._startEpisode(index, start_episode)
+
+            started = len(active)
+
+            if profiler is not None:
+                t = clock()
+
+            self._addValues(model, [current[index] for index in active])
+
+            if profiler is not None:
+                profiler.record('values', t)
+
+            while len(active) > 0:
+                running = [current[index] for index in active]
+
+                if profiler is not None:
+                    t = clock()
+
+                # Let the learning update its values and choose the actions
+                probas, _ = learning.actionsBatch(running)
+
+                if profiler is not None:
+                    t = profiler.record('actions', t)
+
+                actions = sampler.sampleBatch(probas)
+
+                if profiler is not None:
+                    t = profiler.record('choice', t)
+
+                states, rewards, finished = self.performActions(active, actions)
+
+                if profiler is not None:
+                    t = profiler.record('performActions', t)
+
+                # Bounds of the states, for plotModel()
+                bounds = asarray(states, dtype=float64)
+                size = bounds.shape[1]
+
+                self._min_state = minimum(self._min_state[:size], bounds.min(axis=0)).tolist()
+                self._max_state = maximum(self._max_state[:size], bounds.max(axis=0)).tolist()
+
+                for episode, action, state, reward in zip(running, actions, states, rewards):
+                    episode.addReward(reward)
+                    episode.addAction(action)
+                    episode.addState(self.encoding(state))
+
+                if profiler is not None:
+                    t = profiler.record('encoding', t)
+
+                self._addValues(model, running)
+
+                if profiler is not None:
+                    t = profiler.record('values', t)
+
+                # Let the learning update the Q-value of the last state visited
+                # by the copies whose episode is finished
+                for index in active:
+                    steps[index] += 1
+
+                finished = [done or steps[index] >= max_episode_length for index, done in zip(active, finished)]
+                learning.finishEpisodes([episode for episode, done in zip(running, finished) if done])
+
+                if profiler is not None:
+                    profiler.record('finishEpisodes', t)
+
+                # Handle the copies whose episode is finished
+                still_active = []
+                restarted = []
+
+                for index, episode, done in zip(active, running, finished):
+                    if not done:
+                        still_active.append(index)
+                        continue
+
+                    if verbose:
+                        print("episode=", completed, "/", num_episodes, "reward=", episode.cumulative_reward)
+
+                    if profiler is not None:
+                        profiler.endEpisode(steps[index])
+
+                    # If a batch has been finished, learn
+                    if recorder is None:
+                        episodes.append(episode)
+                    else:
+                        recorder.record(episode)
+
+                    completed += 1
+                    learn_episodes.append(episode)
+
+                    if len(learn_episodes) == batch_size:
+                        if profiler is not None:
+                            t = clock()
+
+                        if replay is None:
+                            model.learn(learn_episodes)
+                        else:
+                            replay.learn(model, learn_episodes)
+
+                        if profiler is not None:
+                            profiler.record('learn', t)
+
+                        # Make learnt episodes smaller, we only want to keep their cumulative reward
+                        for le in learn_episodes:
+                            le.states = None
+                            le.values = None
+                            le.rewards = None
+                            le.actions = None
+
+                        learn_episodes = []
+
+                        if checkpointer is not None:
+                            checkpointer.batchLearned(self, model, learning, batch_size, replay)
+
+                    # Start a new episode on this copy if more episodes are needed
+                    if started < num_episodes:
+                        current[index] = self._startEpisode(index, start_episode)
+                        steps[index] = 0
+                        started += 1
+
+                        still_active.append(index)
+                        restarted.append(current[index])
+
+                if profiler is not None:
+                    t = clock()
+
+                self._addValues(model, restarted)
+
+                if profiler is not None:
+                    profiler.record('values', t)
+
+                active = still_active
+        except KeyboardInterrupt:
+            # Allow the user to gracefully interrupt the learning process
+            if not verbose:
+                raise
+        finally:
+            if profiler is not None:
+                profiler.end()
+
+            if recorder is not None:
+                recorder.flush()
+
+            if checkpointer is not None:
+                checkpointer.wait()
+
+        return episodes
+
+    def _startEpisode(self, index, start_episode=None):
+        """ Reset the copy @p index and return a new episode that contains
+            its initial state, or a fork of @p start_episode if not None.
+        """
+        if start_episode is None:
+            episode = Episode()
+            episode.addState(self.encoding(self.initialState(index)))
+
+            self.resetCopy(index)
+        else:
+            episode = start_episode.fork()
+
+            self.startCopy(index, start_episode)
+
+        return episode
+
+    def _addValues(self, model, episodes):
+        """ Predict the values of the last state of every episode in a single
+            batched call to the model.
+        """
+        if len(episodes) == 0:
+            return
+
+        for episode, values in zip(episodes, model.valuesBatch(episodes)):
+            episode.addValues(values)
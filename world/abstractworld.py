@@ -20,14 +20,14 @@
 # THE SOFTWARE.
 
 from __future__ import print_function
-import matplotlib.pyplot as plt
 import math
-import copy
 
-from numpy.random import choice
-from numpy import arange, ndarray
+from numpy import arange, ndarray, array
 
 from .episode import *
+from .profiler import *
+from .actionsampler import *
+from serialization import *
 
 def encode_identity(state):
     """ Identity encoding, does not change the state
@@ -62,6 +62,8 @@ class AbstractWorld(object):
     """
     def __init__(self):
         self.encoding = encode_identity
+        self.profiler = None                    # Profiler used by run(), None to disable profiling
+        self.sampler = None                     # ActionSampler used by run(), created when needed
 
         self._min_state = [1e20] * 1000         # This big vector will be truncated the first time a state is encountered un run()
         self._max_state = [-1e20] * 1000
@@ -72,6 +74,43 @@ class AbstractWorld(object):
         """
         raise NotImplementedError('The world does not implement nb_actions()')
 
+    def stateRanges(self):
+        """ Return a list of (min, max) tuples giving the inclusive range of
+            every (not encoded) state variable, or None if the states are not
+            made of bounded integers.
+        """
+        return None
+
+    def getState(self):
+        """ Return a dictionary of NumPy arrays describing the state of the
+            world between two episodes, see Checkpointer
+        """
+        state = {
+            'min_state': array(self._min_state),
+            'max_state': array(self._max_state),
+        }
+        state.update(prefixed('sampler', self.actionSampler().getState()))
+
+        return state
+
+    def setState(self, state):
+        """ Restore a state returned by getState()
+        """
+        self._min_state = state['min_state'].tolist()
+        self._max_state = state['max_state'].tolist()
+
+        if 'sampler/generator' in state:
+            self.actionSampler().setState(unprefixed('sampler', state))
+
+    def actionSampler(self):
+        """ Return the ActionSampler used to choose the actions performed in
+            this world. An unseeded sampler is created if none has been set.
+        """
+        if self.sampler is None:
+            self.sampler = ActionSampler()
+
+        return self.sampler
+
     def reset(self):
         """ Reset the world in its original configuration, as if no agent performed
             actions on it.
@@ -93,11 +132,24 @@ class AbstractWorld(object):
         """
         self.performAction(action)
 
+    def restore(self, episode):
+        """ Put the world in the state reached at the end of @p episode, so that
+            a run can continue it (see the start_episode parameter of run()).
+            This default implementation replays the episode in the world.
+        """
+        self.initial = episode.states[0]
+        self.reset()
+
+        for action, target in zip(episode.actions, list(episode.states)[1:]):
+            self.performActionSupervised(action, target)
+
     def plotModel(self, model):
         """ Product PDF files that show graphically the values of a model that
             is used to represent this world. This function does not know the meaning
             of the values stored by the model.
         """
+        import matplotlib.pyplot as plt
+
         episode = Episode()
         print('Plotting model')
 
@@ -162,7 +214,23 @@ class AbstractWorld(object):
         else:
             print('Unable to plot models of dimension 3 or above')
 
-    def run(self, model, learning, num_episodes, max_episode_length, batch_size, verbose=True, start_episode=None):
+    def beginProfiling(self):
+        """ Return the profiler that has to be used by a run that starts, or
+            None if the run is not profiled. Runs nested in a profiled run (the
+            rollouts of TExploreModel for instance) use a child of the profiler
+            of the outer run.
+        """
+        profiler = self.profiler
+
+        if profiler is None and Profiler.current() is not None:
+            profiler = Profiler.current().child(self.__class__.__name__)
+
+        if profiler is not None:
+            profiler.begin()
+
+        return profiler
+
+    def run(self, model, learning, num_episodes, max_episode_length, batch_size, verbose=True, start_episode=None, replay=None, recorder=None, checkpointer=None):
         """ Simulate an agent in this world.
 
             @param learning Learning algorithm used by the agent
@@ -176,12 +244,23 @@ class AbstractWorld(object):
                                  start_episode. This allows to "pre-initialize"
                                  the episodes, for instance by providing past
                                  history.
+            @param replay If not None, ReplayBuffer in which the samples of the
+                          episodes are stored. The model then learns from
+                          minibatches drawn from it instead of from the last
+                          @p batch_size episodes.
+            @param recorder If not None, EpisodeLog in which the episodes are
+                            recorded. The episodes are then not kept in memory
+                            and not returned.
+            @param checkpointer If not None, Checkpointer used to save the state
+                                of the run after the model has learned a batch
+                                of episodes
 
             @return A list of Episode objects
         """
         episodes = []
         learn_episodes = []
-        possible_actions = list(range(self.nb_actions()))
+        sampler = self.actionSampler()
+        profiler = self.beginProfiling()
 
         try:
             for e in range(num_episodes):
@@ -192,50 +271,90 @@ class AbstractWorld(object):
 
                     self.reset()
                 else:
-                    episode = copy.deepcopy(start_episode)
+                    self.restore(start_episode)
 
-                    # Replay the episode in the world
-                    self.initial = episode.states[0]
-                    self.reset()
+                    episode = start_episode.fork()
 
-                    for action, target in zip(episode.actions, list(episode.states)[1:]):
-                        self.performActionSupervised(action, target)
+                if profiler is not None:
+                    t = clock()
 
                 episode.addValues(model.values(episode))
 
+                if profiler is not None:
+                    profiler.record('values', t)
+
                 finished = False
                 steps = 0
 
                 # Perform the steps
                 while steps < max_episode_length and not finished:
+                    if profiler is not None:
+                        t = clock()
+
                     probas, _ = learning.actions(episode)
 
-                    action = choice(possible_actions, p=probas)
+                    if profiler is not None:
+                        t = profiler.record('actions', t)
+
+                    action = sampler.sample(probas)
+
+                    if profiler is not None:
+                        t = profiler.record('choice', t)
 
                     state, reward, finished = self.performAction(action)
 
+                    if profiler is not None:
+                        t = profiler.record('performAction', t)
+
                     self._min_state = [min(a, b) for a, b in zip(self._min_state, state)]
                     self._max_state = [max(a, b) for a, b in zip(self._max_state, state)]
 
                     episode.addReward(reward)
                     episode.addAction(action)
                     episode.addState(self.encoding(state))
+
+                    if profiler is not None:
+                        t = profiler.record('encoding', t)
+
                     episode.addValues(model.values(episode))
 
+                    if profiler is not None:
+                        profiler.record('values', t)
+
                     steps += 1
 
                 # Let the learning update the Q-value of the last state visited
+                if profiler is not None:
+                    t = clock()
+
                 learning.finishEpisode(episode)
 
+                if profiler is not None:
+                    profiler.record('finishEpisode', t)
+                    profiler.endEpisode(steps)
+
                 # If a batch has been finished, learn
-                episodes.append(episode)
+                if recorder is None:
+                    episodes.append(episode)
+                else:
+                    recorder.record(episode)
+
                 learn_episodes.append(episode)
 
                 if verbose:
                     print("episode=", e,"/", num_episodes, "reward=", episode.cumulative_reward)
 
                 if len(learn_episodes) == batch_size:
-                    model.learn(learn_episodes)
+                    if profiler is not None:
+                        t = clock()
+
+                    if replay is None:
+                        model.learn(learn_episodes)
+                    else:
+                        replay.learn(model, learn_episodes)
+
+                    if profiler is not None:
+                        profiler.record('learn', t)
 
                     # Make learnt episodes smaller, we only want to keep their cumulative reward
                     for le in learn_episodes:
@@ -245,9 +364,21 @@ class AbstractWorld(object):
                         le.actions = None
 
                     learn_episodes = []
+
+                    if checkpointer is not None:
+                        checkpointer.batchLearned(self, model, learning, batch_size, replay)
         except KeyboardInterrupt:
             # Allow the user to gracefully interrupt the learning process
             if not verbose:
                 raise
+        finally:
+            if profiler is not None:
+                profiler.end()
+
+            if recorder is not None:
+                recorder.flush()
+
+            if checkpointer is not None:
+                checkpointer.wait()
 
         return episodes
@@ -0,0 +1,140 @@
+#
+# Copyright (c) 2015 Vrije Universiteit Brussel
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import json
+
+from numpy import array, cumsum, minimum, concatenate
+from numpy.random import Generator, PCG64, SeedSequence
+
+BUFFER_SIZE = 4096
+
+class ActionSampler(object):
+    """ Sample actions from probability distributions, using uniform numbers
+        drawn in advance from a seeded NumPy Generator. The distributions are
+        neither validated nor normalized (they only have to be non-negative),
+        so that sampling costs a cumulative sum and a search.
+
+        The actions sampled only depend on the seed of the sampler, so that
+        a run is reproducible. Independent samplers (for worker processes for
+        instance) are obtained with spawn().
+    """
+
+    def __init__(self, seed=None, buffer_size=BUFFER_SIZE):
+        """ Constructor.
+
+            @param seed Integer seed, SeedSequence, or None to draw a seed from
+                        the entropy of the operating system
+            @param buffer_size Number of uniform numbers drawn at once
+        """
+        if not isinstance(seed, SeedSequence):
+            seed = SeedSequence(seed)
+
+        self.buffer_size = buffer_size
+
+        self._seed = seed
+        self._generator = Generator(PCG64(seed))
+        self._generator_state = None    # State of the generator before the buffer has been drawn
+        self._buffer = array([])
+        self._position = 0
+
+    def spawn(self, count):
+        """ Return a list of @p count samplers whose streams are independent
+            from each other and from this sampler
+        """
+        return [ActionSampler(seed, self.buffer_size) for seed in self._seed.spawn(count)]
+
+    def generator(self):
+        """ Return a NumPy Generator whose stream is independent from the
+            stream of this sampler, of the samplers returned by spawn() and of
+            the other generators returned by this method. The generators only
+            depend on the seed and on the order of the calls, so that the
+            components of a run (models, replay buffer) can draw reproducible
+            random numbers.
+        """
+        return Generator(PCG64(self._seed.spawn(1)[0]))
+
+    def uniforms(self, count):
+        """ Return an array of @p count uniform numbers in [0, 1)
+        """
+        parts = []
+
+        while count > 0:
+            if self._position == len(self._buffer):
+                self._refill()
+
+            part = self._buffer[self._position:self._position + count]
+            self._position += len(part)
+            count -= len(part)
+
+            parts.append(part)
+
+        if len(parts) == 1:
+            return parts[0]
+        else:
+            return concatenate(parts)
+
+    def sample(self, probas):
+        """ Return the index of an action sampled from the probability
+            distribution @p probas (sequence of nb_actions floats)
+        """
+        cdf = cumsum(probas)
+        draw = self.uniforms(1)[0] * cdf[-1]
+
+        return min(int(cdf.searchsorted(draw, side='right')), len(cdf) - 1)
+
+    def sampleBatch(self, probas):
+        """ Sample one action from each row of @p probas, using inverse
+            transform sampling on the cumulative distributions.
+
+            @return A list of action indexes
+        """
+        cdf = cumsum(probas, axis=1)
+        draws = self.uniforms(len(cdf)) * cdf[:, -1]
+
+        actions = (draws[:, None] >= cdf).sum(axis=1)
+
+        return minimum(actions, cdf.shape[1] - 1).tolist()
+
+    def getState(self):
+        """ Return a dictionary of NumPy arrays describing the position of the
+            sampler in its stream, see Checkpointer
+        """
+        if self._generator_state is None:
+            self._refill()
+
+        return {
+            'generator': array(json.dumps(self._generator_state)),
+            'position': array(self._position),
+        }
+
+    def setState(self, state):
+        """ Restore a state returned by getState()
+        """
+        self._generator.bit_generator.state = json.loads(str(state['generator']))
+        self._refill()
+        self._position = int(state['position'])
+
+    def _refill(self):
+        """ Draw a new buffer of uniform numbers
+        """
+        self._generator_state = self._generator.bit_generator.state
+        self._buffer = self._generator.random(self.buffer_size)
+        self._position = 0
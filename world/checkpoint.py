@@ -0,0 +1,213 @@
+#
+# Copyright (c) 2015 Vrije Universiteit Brussel
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import os
+import random
+import threading
+
+import numpy
+from numpy import array, int64, float64
+
+from serialization import *
+
+def rng_state():
+    """ Return the state of the random number generators of Python and NumPy
+    """
+    version, internal, gauss = random.getstate()
+    name, keys, pos, has_gauss, cached_gaussian = numpy.random.get_state()
+
+    return {
+        'random_version': array(version),
+        'random_internal': array(internal, dtype=int64),
+        'random_gauss': array(float('nan') if gauss is None else gauss),
+        'numpy_keys': keys,
+        'numpy_pos': array(pos),
+        'numpy_gauss': array([has_gauss, cached_gaussian], dtype=float64),
+    }
+
+def set_rng_state(state):
+    """ Restore the state of the random number generators, see rng_state()
+    """
+    gauss = float(state['random_gauss'])
+
+    random.setstate((
+        int(state['random_version']),
+        tuple([int(i) for i in state['random_internal']]),
+        None if gauss != gauss else gauss
+    ))
+    numpy.random.set_state((
+        'MT19937',
+        state['numpy_keys'],
+        int(state['numpy_pos']),
+        int(state['numpy_gauss'][0]),
+        float(state['numpy_gauss'][1])
+    ))
+
+class Checkpointer(object):
+    """ Periodically save the state of a run (world, model, learning algorithm,
+        random number generators and number of episodes) to a NumPy .npz file,
+        so that an interrupted run can be resumed.
+
+        Checkpoints are taken by AbstractWorld.run() after the model has learned
+        a batch of episodes. The state is copied in the main thread, and written
+        to the disk by a background thread, so that the run does not wait for
+        the disk. If a checkpoint is still being written when the next one is
+        taken, the oldest one that has not been written yet is dropped. An
+        error of the background thread is raised by the next call to save()
+        or wait().
+
+        A resumed run is identical to an uninterrupted one when all its
+        components save their whole state. This is not the case of the FANN
+        and clstm networks, whose files contain the weights but not the state
+        of their training algorithm.
+    """
+
+    def __init__(self, path, every):
+        """ Constructor.
+
+            @param path Name of the checkpoint file. It is replaced atomically
+                        by every new checkpoint.
+            @param every Minimum number of episodes between two checkpoints
+        """
+        self.path = path
+        self.every = every
+        self.episode = 0            # Number of episodes learned by the model
+
+        self._saved = 0
+        self._pending = None
+        self._writing = False
+        self._error = None
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def load(self, world, model, learning, replay=None):
+        """ Restore the state stored in the checkpoint file.
+
+            @param replay If not None, ReplayBuffer whose samples and priorities
+                          are restored
+            @return The number of episodes performed before the checkpoint
+        """
+        with open(self.path, 'rb') as f:
+            data = numpy.load(f)
+            state = dict([(key, data[key]) for key in data.files])
+
+        world.setState(unprefixed('world', state))
+        model.setState(unprefixed('model', state))
+        learning.setState(unprefixed('learning', state))
+
+        if replay is not None:
+            replay.setState(unprefixed('replay', state))
+
+        set_rng_state(unprefixed('rng', state))
+
+        self.episode = int(state['episode'])
+        self._saved = self.episode
+
+        return self.episode
+
+    def batchLearned(self, world, model, learning, episodes, replay=None):
+        """ Called by AbstractWorld.run() when the model has learned @p episodes
+            new episodes. Take a checkpoint if enough episodes have been
+            performed since the last one.
+        """
+        self.episode += episodes
+
+        if self.episode - self._saved >= self.every:
+            self.save(world, model, learning, replay)
+
+    def save(self, world, model, learning, replay=None):
+        """ Take a checkpoint, written to the disk in the background
+
+            @param replay If not None, ReplayBuffer used by the run, whose
+                          samples and priorities are saved with the components
+        """
+        self._raiseError()
+
+        state = {'episode': array(self.episode)}
+
+        state.update(prefixed('world', world.getState()))
+        state.update(prefixed('model', model.getState()))
+        state.update(prefixed('learning', learning.getState()))
+
+        if replay is not None:
+            state.update(prefixed('replay', replay.getState()))
+
+        state.update(prefixed('rng', rng_state()))
+
+        # Copy the arrays, the components keep modifying them
+        state = dict([(key, array(value, copy=True)) for key, value in state.items()])
+
+        with self._condition:
+            self._pending = state
+            self._condition.notify_all()
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._write)
+            self._thread.daemon = True
+            self._thread.start()
+
+        self._saved = self.episode
+
+    def wait(self):
+        """ Wait until the last checkpoint taken has been written to the disk
+        """
+        with self._condition:
+            while self._pending is not None or self._writing:
+                self._condition.wait()
+
+        self._raiseError()
+
+    def _raiseError(self):
+        """ Raise in the calling thread the exception that prevented the last
+            checkpoint from being written
+        """
+        if self._error is not None:
+            error = self._error
+            self._error = None
+
+            raise error
+
+    def _write(self):
+        """ Body of the background thread that writes the checkpoints
+        """
+        while True:
+            with self._condition:
+                while self._pending is None:
+                    self._condition.wait()
+
+                state = self._pending
+                self._pending = None
+                self._writing = True
+
+            try:
+                # Write a temporary file, then replace the previous checkpoint with it
+                tmp_path = self.path + '.tmp'
+
+                with open(tmp_path, 'wb') as f:
+                    numpy.savez(f, **state)
+
+                getattr(os, 'replace', os.rename)(tmp_path, self.path)
+            except Exception as e:
+                self._error = e
+            finally:
+                with self._condition:
+                    self._writing = False
+                    self._condition.notify_all()
@@ -19,21 +19,189 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
-import collections
+import copy
+
+from numpy import empty, float32, float64, int32
 
 MAX_EPISODE_LENGTH = 100
 
+class RingBuffer(object):
+    """ Sequence of at most @p capacity rows of the same shape, the oldest rows
+        being dropped when new ones are appended. The rows are stored in a
+        preallocated NumPy array twice as large as the capacity, so that the
+        content of the buffer is always available as a contiguous array view.
+    """
+
+    def __init__(self, capacity, dtype):
+        """ Constructor.
+
+            @param capacity Maximum number of rows kept in the buffer
+            @param dtype NumPy type of the elements of the rows
+        """
+        self.capacity = capacity
+        self.dtype = dtype
+        self.total = 0              # Number of rows ever appended to the buffer
+
+        self._data = None           # Allocated when the shape of the rows is known
+        self._start = 0
+        self._end = 0
+        self._storage = [0, False]  # End of the rows written in _data, whether _data is shared by forks
+
+    def append(self, row):
+        """ Append a row (a scalar or a sequence of numbers) at the end of the buffer
+        """
+        if self._data is None:
+            self._data = empty(shape=(2 * self.capacity,) + self._shape(row), dtype=self.dtype)
+            self._storage = [0, False]
+        elif self._end != self._storage[0] or (self._end == len(self._data) and self._storage[1]):
+            # A fork has appended rows after ours in the shared array, or our rows
+            # have to be moved but forks may still read them. Copy the rows in
+            # a new array that this buffer owns.
+            self._move(empty(shape=self._data.shape, dtype=self.dtype))
+        elif self._end == len(self._data):
+            # Move the most recent rows to the beginning of the array. This happens
+            # once every capacity appends at most.
+            self._move(self._data)
+
+        self._data[self._end] = row
+        self._end += 1
+        self._storage[0] = self._end
+        self.total += 1
+
+        if self._end - self._start > self.capacity:
+            self._start += 1
+
+    def clear(self):
+        """ Remove all the rows from the buffer. The array is kept for future rows.
+        """
+        if self._storage[1]:
+            # Forks may still read the array, do not overwrite it
+            self._data = None
+
+        self._start = 0
+        self._end = 0
+        self._storage = [0, False]
+
+    def fork(self):
+        """ Return a copy of the buffer, in O(1). The copy shares the array of
+            this buffer, and the first of them that appends rows after another
+            one did copies its rows in a new array (copy-on-write).
+        """
+        other = copy.copy(self)
+        self._storage[1] = True
+
+        return other
+
+    def copy(self):
+        """ Return a copy of the buffer that owns a copy of its rows, so that
+            the rows of one buffer can be modified in place without changing
+            the other one. Unlike fork(), this costs O(len(self)).
+        """
+        other = RingBuffer(self.capacity, self.dtype)
+        other.total = self.total
+
+        if self._data is not None:
+            other._data = empty(shape=self._data.shape, dtype=self.dtype)
+            other._end = len(self)
+            other._storage = [other._end, False]
+            other._data[0:other._end] = self.array()
+
+        return other
+
+    def array(self):
+        """ Return an array view on the rows of the buffer, the oldest one first.
+
+            @note The view is only valid until the next call to append()
+        """
+        if self._data is None:
+            return empty(shape=(0,), dtype=self.dtype)
+
+        return self._data[self._start:self._end]
+
+    def __len__(self):
+        return self._end - self._start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.array()[index]
+
+        size = self._end - self._start
+
+        if index < -size or index >= size:
+            raise IndexError('RingBuffer index out of range')
+
+        return self._data[(self._end if index < 0 else self._start) + index]
+
+    def __iter__(self):
+        return iter(self.array())
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None:
+            return self.array()
+        else:
+            return self.array().astype(dtype)
+
+    def _move(self, data):
+        """ Move the most recent rows of the buffer at the beginning of @p data,
+            keeping room for at least one new row.
+        """
+        size = min(self._end - self._start, self.capacity - 1)
+
+        data[0:size] = self._data[self._end - size:self._end]
+
+        if data is not self._data:
+            self._data = data
+            self._storage = [0, False]
+
+        self._start = 0
+        self._end = size
+        self._storage[0] = size
+
+    def _shape(self, row):
+        """ Shape of a row, () for scalars
+        """
+        try:
+            return (len(row),)
+        except TypeError:
+            return ()
+
 class Episode(object):
-    """ Sequence of actions and observations that correspond to a learning episode
+    """ Sequence of actions and observations that correspond to a learning episode.
+
+        The states, values, actions and rewards are stored in ring buffers of
+        NumPy numbers. The values are kept in double precision because some
+        learning algorithms let them grow very large. Models can obtain all the states or values
+        of an episode, without any copy, using episode.states.array() and
+        episode.values.array().
     """
 
-    def __init__(self):
-        self.states = collections.deque([], MAX_EPISODE_LENGTH)
-        self.values = collections.deque([], MAX_EPISODE_LENGTH)
-        self.actions = collections.deque([], MAX_EPISODE_LENGTH)
-        self.rewards = collections.deque([], MAX_EPISODE_LENGTH)
+    def __init__(self, capacity=MAX_EPISODE_LENGTH):
+        """ Constructor.
+
+            @param capacity Maximum number of time steps remembered by the
+                            episode. Older time steps are forgotten.
+        """
+        self.states = RingBuffer(capacity, float32)
+        self.values = RingBuffer(capacity, float64)
+        self.actions = RingBuffer(capacity, int32)
+        self.rewards = RingBuffer(capacity, float32)
         self.cumulative_reward = 0.0
 
+    def fork(self):
+        """ Return a copy of the episode. The copy and the episode share their
+            states, actions and rewards until one of them appends observations
+            to them, see RingBuffer.fork(). The values are copied, because the
+            learning algorithms modify them in place. This costs O(capacity)
+            at most, regardless of the number of time steps of the episode.
+        """
+        episode = copy.copy(self)
+        episode.states = self.states.fork()
+        episode.values = self.values.copy()
+        episode.actions = self.actions.fork()
+        episode.rewards = self.rewards.fork()
+
+        return episode
+
     def addState(self, state):
         """ Add a state observation to the episode
         """
@@ -50,7 +218,7 @@ class Episode(object):
             after having performed an action.
         """
         self.rewards.append(reward)
-        self.cumulative_reward += reward
+        self.cumulative_reward += float(reward)
 
     def addValues(self, values):
         """ Add values for actions of the last state.
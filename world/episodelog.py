@@ -0,0 +1,174 @@
+#
+# Copyright (c) 2015 Vrije Universiteit Brussel
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import os
+import json
+
+from numpy import array, empty, memmap, dtype, float32, float64, int32, int64
+
+class EpisodeLog(object):
+    """ Append-only log of the episodes of a run, stored on disk so that long
+        runs do not have to keep their episodes in memory.
+
+        The log is a directory containing one binary file per column. Every
+        episode appends one row to the summary columns (cumulative_reward and
+        steps). When transitions are recorded, the states, actions and rewards
+        remembered by the episodes are appended to the states, actions and
+        rewards columns, and nb_states and nb_actions give the number of rows
+        that every episode added to these columns. The columns can be read as
+        memory-mapped arrays with column().
+    """
+
+    def __init__(self, path, transitions=False, append=True):
+        """ Open the log stored in the directory @p path, created if needed.
+
+            @param transitions True to record the time steps of the episodes,
+                               False to only record their summary
+            @param append True to append the new episodes after the ones
+                          already present in the log, False to remove them
+        """
+        self.path = path
+        self.transitions = transitions
+
+        self._files = {}
+        self._columns = {}          # Name -> (dtype, shape of a row)
+
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+        if os.path.exists(self._indexPath()):
+            with open(self._indexPath()) as f:
+                for name, (type_name, shape) in json.load(f).items():
+                    self._columns[name] = (dtype(type_name), tuple(shape))
+
+            if not append:
+                for name in self._columns:
+                    os.remove(self._columnPath(name))
+
+                os.remove(self._indexPath())
+                self._columns = {}
+
+    def record(self, episode):
+        """ Append @p episode to the log. The episode still has to contain its
+            time steps if transitions are recorded.
+        """
+        self._append('cumulative_reward', float64, array([episode.cumulative_reward]))
+        self._append('steps', int64, array([episode.actions.total]))
+
+        if self.transitions:
+            self._append('nb_states', int64, array([len(episode.states)]))
+            self._append('nb_actions', int64, array([len(episode.actions)]))
+            self._append('states', float32, episode.states.array())
+            self._append('actions', int32, episode.actions.array())
+            self._append('rewards', float32, episode.rewards.array())
+
+    def column(self, name):
+        """ Return a read-only memory-mapped array containing all the rows of
+            the column @p name
+        """
+        column_type, shape = self._columns[name]
+        self.flush()
+
+        rows = os.path.getsize(self._columnPath(name)) // self._rowSize(name)
+
+        if rows == 0:
+            return empty(shape=(0,) + shape, dtype=column_type)
+
+        return memmap(self._columnPath(name), dtype=column_type, mode='r', shape=(rows,) + shape)
+
+    def __len__(self):
+        """ Number of episodes in the log
+        """
+        if 'steps' not in self._columns:
+            return 0
+
+        return len(self.column('steps'))
+
+    def truncate(self, episodes):
+        """ Remove all the episodes except the first @p episodes ones. This
+            allows a resumed run to continue the log of the interrupted one.
+        """
+        rows = {'cumulative_reward': episodes, 'steps': episodes}
+
+        if 'nb_states' in self._columns:
+            rows['nb_states'] = episodes
+            rows['nb_actions'] = episodes
+            rows['states'] = int(self.column('nb_states')[:episodes].sum())
+            rows['actions'] = int(self.column('nb_actions')[:episodes].sum())
+            rows['rewards'] = rows['actions']
+
+        self.close()
+
+        for name, count in rows.items():
+            if name not in self._columns:
+                continue
+
+            with open(self._columnPath(name), 'r+b') as f:
+                f.truncate(min(count * self._rowSize(name), os.path.getsize(self._columnPath(name))))
+
+    def flush(self):
+        """ Write the buffered rows to the disk
+        """
+        for f in self._files.values():
+            f.flush()
+
+    def close(self):
+        """ Close the files of the log. It can still be read with column().
+        """
+        for f in self._files.values():
+            f.close()
+
+        self._files = {}
+
+    def _append(self, name, column_type, rows):
+        """ Append @p rows (array having one row per element) to a column
+        """
+        f = self._files.get(name)
+
+        if f is None:
+            if name not in self._columns:
+                # New column, its rows have the shape of the rows given
+                self._columns[name] = (dtype(column_type), rows.shape[1:])
+
+                with open(self._indexPath(), 'w') as index:
+                    json.dump(dict([(n, (t.str, s)) for n, (t, s) in self._columns.items()]), index)
+
+            f = open(self._columnPath(name), 'ab')
+            self._files[name] = f
+
+        f.write(rows.astype(self._columns[name][0], copy=False).tobytes())
+
+    def _rowSize(self, name):
+        """ Size in bytes of a row of the column @p name
+        """
+        column_type, shape = self._columns[name]
+        size = column_type.itemsize
+
+        for dimension in shape:
+            size *= dimension
+
+        return size
+
+    def _columnPath(self, name):
+        return os.path.join(self.path, name + '.bin')
+
+    def _indexPath(self):
+        return os.path.join(self.path, 'columns.json')
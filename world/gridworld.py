@@ -21,6 +21,8 @@
 
 import random
 
+from numpy import array
+
 from .abstractworld import *
 from .episode import *
 
@@ -32,7 +34,7 @@ class GridWorld(AbstractWorld):
     DOWN = 2
     LEFT = 3
 
-    def __init__(self, width, height, initial, goal, obstacle, stochastic):
+    def __init__(self, width, height, initial, goal, obstacle, stochastic, rng=random):
         """ Create a new grid world.
 
             @param width Width of the world, in number of cells
@@ -41,6 +43,8 @@ class GridWorld(AbstractWorld):
             @param goal (x, y) coordinates of the goal
             @param obstacle (x, y) coordinates of the obstacle
             @param stochastic True if noise has to be added to the actions taken
+            @param rng Random number generator (random.Random instance or the
+                       random module) used to draw stochastic initial positions
             @param polar True if the agent must only be able to sense its orientation
                    and distance to the closest wall
         """
@@ -52,12 +56,26 @@ class GridWorld(AbstractWorld):
         self.goal = goal
         self.obstacle = obstacle
         self.stochastic = stochastic
+        self.rng = rng
 
         self.reset()
 
     def nb_actions(self):
         return 4
 
+    def stateRanges(self):
+        return [(0, self.width - 1), (0, self.height - 1)]
+
+    def getState(self):
+        state = super(GridWorld, self).getState()
+        state['initial'] = array(self.initial)
+
+        return state
+
+    def setState(self, state):
+        super(GridWorld, self).setState(state)
+        self.initial = tuple(state['initial'].tolist())
+
     def reset(self):
         # The current position is set to the initial position
         self._current_pos = self.initial
@@ -65,7 +83,7 @@ class GridWorld(AbstractWorld):
         if self.stochastic:
             # The initial position is updated if the world is stochastic (so that
             # the next reset() call or episode will see the new initial position)
-            self.initial = (random.randrange(self.width), random.randrange(self.height))
+            self.initial = (self.rng.randrange(self.width), self.rng.randrange(self.height))
 
     def performAction(self, action):
         # Compute the coordinates of the candidate new position
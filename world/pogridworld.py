@@ -28,10 +28,14 @@ class POGridWorld(GridWorld):
         The agent can only sense its x coordinate
     """
 
-    def __init__(self, width, height, initial, goal, obstacle, stochastic):
+    def __init__(self, width, height, initial, goal, obstacle, stochastic, rng=random):
         """ Create a new grid world.
         """
-        super(POGridWorld, self).__init__(width, height, initial, goal, obstacle, stochastic)
+        super(POGridWorld, self).__init__(width, height, initial, goal, obstacle, stochastic, rng)
+
+    def stateRanges(self):
+        # The initial state of an episode is the full (x, y) initial position
+        return [(0, self.width - 1), (0, self.height - 1)]
 
     def performAction(self, action):
         # Normal action in the gridworld
@@ -33,10 +33,16 @@ class PolarGridWorld(GridWorld):
     GO_FORWARD = 2
     GO_BACKWARD = 3
 
-    def __init__(self, width, height, initial, goal, obstacle, stochastic):
+    def __init__(self, width, height, initial, goal, obstacle, stochastic, rng=random):
         """ Create a new grid world.
         """
-        super(PolarGridWorld, self).__init__(width, height, initial, goal, obstacle, stochastic)
+        super(PolarGridWorld, self).__init__(width, height, initial, goal, obstacle, stochastic, rng)
+
+    def stateRanges(self):
+        # The distance is measured from the candidate position, that may be
+        # one cell outside the grid. The initial state of an episode is the
+        # (x, y) initial position.
+        return [(-1, max(self.width, self.height)), (0, max(3, self.height - 1))]
 
     def reset(self):
         super(PolarGridWorld, self).reset()
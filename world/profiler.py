@@ -0,0 +1,213 @@
+#
+# Copyright (c) 2015 Vrije Universiteit Brussel
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from __future__ import print_function
+
+from timeit import default_timer as clock
+from numpy import percentile, float64
+
+from .episode import *
+
+LATENCY_SAMPLES = 4096
+
+class PhaseStats(object):
+    """ Number of calls and latencies of one phase of a run. The most recent
+        latencies are kept in a ring buffer, so that percentiles can be computed
+        in bounded memory.
+    """
+
+    def __init__(self, samples=LATENCY_SAMPLES):
+        self.calls = 0
+        self.total = 0.0
+        self._latencies = RingBuffer(samples, float64)
+
+    def add(self, elapsed):
+        """ Record one call to the phase that lasted @p elapsed seconds
+        """
+        self.calls += 1
+        self.total += elapsed
+        self._latencies.append(elapsed)
+
+    def summary(self):
+        """ Return a dictionary with the calls, total, mean and p99 latency (in
+            seconds) of the phase
+        """
+        latencies = self._latencies.array()
+
+        return {
+            'calls': self.calls,
+            'total': self.total,
+            'mean': self.total / max(self.calls, 1),
+            'p99': float(percentile(latencies, 99)) if len(latencies) > 0 else 0.0,
+        }
+
+def print_summary(summary, indent=''):
+    """ Sink that prints a summary produced by Profiler.summary() in the console
+    """
+    print('%s%s: %i episodes, %i steps in %.3f s (%.1f steps/s)' % (
+        indent,
+        summary['name'],
+        summary['episodes'],
+        summary['steps'],
+        summary['elapsed'],
+        summary['steps_per_second']
+    ))
+
+    for phase, stats in sorted(summary['phases'].items(), key=lambda p: -p[1]['total']):
+        print('%s  %-16s calls=%-9i total=%9.3f s  mean=%9.2f us  p99=%9.2f us' % (
+            indent,
+            phase,
+            stats['calls'],
+            stats['total'],
+            stats['mean'] * 1e6,
+            stats['p99'] * 1e6
+        ))
+
+    for child in summary['children']:
+        print_summary(child, indent + '    ')
+
+class Profiler(object):
+    """ Timers and counters for the phases of AbstractWorld.run() (action
+        selection, performing actions, predicting values, learning, etc).
+
+        A profiler is enabled on a world by setting world.profiler. When a run
+        happens while another one is being profiled (the rollouts performed
+        by TExploreModel for instance), it is accounted in a child profiler
+        of the outer one, so that nested runs are not mixed with the outer run.
+    """
+
+    active = []         # Stack of the profilers of the runs being executed
+
+    def __init__(self, sink=print_summary, every=None, name='run'):
+        """ Constructor.
+
+            @param sink Function called with the output of summary() every
+                        @p every episodes and at the end of a run. None to
+                        only collect the statistics.
+            @param every Number of episodes between two calls to @p sink, or
+                         None to call it only at the end of the runs
+            @param name Name of the profiler, shown in the summaries
+        """
+        self.sink = sink
+        self.every = every
+        self.name = name
+        self.phases = {}
+        self.children = []
+        self.steps = 0
+        self.episodes = 0
+        self.elapsed = 0.0
+
+        self._start = None
+        self._parent = None
+
+    @staticmethod
+    def current():
+        """ Return the profiler of the innermost run being executed, or None
+        """
+        if len(Profiler.active) == 0:
+            return None
+
+        return Profiler.active[-1]
+
+    def child(self, name):
+        """ Return the child profiler named @p name, created if needed. Children
+            collect statistics but do not call any sink.
+        """
+        for child in self.children:
+            if child.name == name:
+                return child
+
+        child = Profiler(None, None, name)
+        child._parent = self
+        self.children.append(child)
+
+        return child
+
+    def begin(self):
+        """ Start profiling a run
+        """
+        Profiler.active.append(self)
+        self._start = clock()
+
+    def end(self):
+        """ Stop profiling a run. The top-level profiler sends its summary to
+            its sink.
+        """
+        self.elapsed += clock() - self._start
+        self._start = None
+        Profiler.active.remove(self)
+
+        if self._parent is None:
+            self.dump()
+
+    def record(self, phase, start):
+        """ Account the time elapsed since @p start to @p phase.
+
+            @return The current time, that can be used as the start of the next
+                    phase
+        """
+        now = clock()
+        stats = self.phases.get(phase)
+
+        if stats is None:
+            stats = PhaseStats()
+            self.phases[phase] = stats
+
+        stats.add(now - start)
+
+        return now
+
+    def endEpisode(self, steps):
+        """ Count an episode of @p steps time steps, and send the summary to
+            the sink when every episodes have been performed
+        """
+        self.steps += steps
+        self.episodes += 1
+
+        if self.every is not None and self.episodes % self.every == 0:
+            self.dump()
+
+    def summary(self):
+        """ Return a dictionary describing the statistics collected so far:
+            name, elapsed (seconds), steps, episodes, steps_per_second, phases
+            (name -> PhaseStats.summary()) and children (list of summaries)
+        """
+        elapsed = self.elapsed
+
+        if self._start is not None:
+            # Run still in progress
+            elapsed += clock() - self._start
+
+        return {
+            'name': self.name,
+            'elapsed': elapsed,
+            'steps': self.steps,
+            'episodes': self.episodes,
+            'steps_per_second': self.steps / elapsed if elapsed > 0.0 else 0.0,
+            'phases': dict([(phase, stats.summary()) for phase, stats in self.phases.items()]),
+            'children': [child.summary() for child in self.children],
+        }
+
+    def dump(self):
+        """ Send the current summary to the sink
+        """
+        if self.sink is not None:
+            self.sink(self.summary())
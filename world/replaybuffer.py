@@ -0,0 +1,262 @@
+#
+# Copyright (c) 2015 Vrije Universiteit Brussel
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import numpy.random
+
+from numpy import array, zeros, empty, ones, arange, minimum, maximum, unique, where, float64
+from numpy.random import Generator
+
+from serialization import *
+
+class SumTree(object):
+    """ Binary tree whose leaves contain the priorities of samples, and whose
+        nodes contain the sum of the priorities of their children. This allows
+        to sample leaves proportionally to their priority in O(log n).
+    """
+
+    def __init__(self, capacity):
+        """ Constructor.
+
+            @param capacity Number of leaves of the tree
+        """
+        self.leaves = 1
+
+        while self.leaves < capacity:
+            self.leaves *= 2
+
+        # Node i has children 2i and 2i+1, the leaves are stored at the end
+        self._tree = zeros(shape=(2 * self.leaves,), dtype=float64)
+
+    def total(self):
+        """ Sum of all the priorities
+        """
+        return self._tree[1]
+
+    def max(self):
+        """ Largest priority stored in the tree
+        """
+        return self._tree[self.leaves:].max()
+
+    def __getitem__(self, indexes):
+        return self._tree[self.leaves + indexes]
+
+    def update(self, indexes, priorities):
+        """ Set the priority of the leaves @p indexes (array of integers)
+        """
+        nodes = self.leaves + indexes
+
+        self._tree[nodes] = priorities
+
+        # Update the sums, one level at a time
+        nodes = unique(nodes // 2)
+
+        while nodes[0] >= 1:
+            self._tree[nodes] = self._tree[2 * nodes] + self._tree[2 * nodes + 1]
+            nodes = unique(nodes // 2)
+
+    def find(self, values):
+        """ Return the index of the leaves in which the cumulative sums @p values
+            (array of numbers between 0 and total()) fall
+        """
+        nodes = ones(shape=values.shape, dtype=int)
+        values = values.copy()
+
+        while nodes[0] < self.leaves:
+            left = 2 * nodes
+            right = values >= self._tree[left]
+
+            values -= where(right, self._tree[left], 0.0)
+            nodes = where(right, left + 1, left)
+
+        return nodes - self.leaves
+
+class ReplayBuffer(object):
+    """ Fixed-size memory of the samples (inputs and target values) produced by
+        the models from the episodes, see AbstractModel.samples(). When the
+        buffer is full, the oldest samples are replaced by the new ones.
+
+        The models learn from minibatches of samples drawn from the whole
+        memory, instead of the last episodes only. The minibatches are drawn
+        uniformly, or proportionally to the error of the model on each sample
+        (prioritized experience replay, Schaul et al, 2015).
+
+        The priority of a sample is the error returned by learnSamples(), the
+        distance between the prediction of the model and the target values
+        stored for the sample. These targets have been computed by the
+        learning algorithm when the episode was learned (Q + alpha * TD error),
+        so this error is proportional to the TD error of the time step at that
+        time. Unlike Schaul et al, the TD error is not recomputed from the
+        current values of the next state, which are not stored.
+    """
+
+    def __init__(self, capacity, batch_size, updates=1, prioritized=False, alpha=0.6, beta=0.4, epsilon=1e-3, rng=numpy.random):
+        """ Constructor.
+
+            @param capacity Maximum number of samples stored in the buffer
+            @param batch_size Number of samples in a minibatch
+            @param updates Number of minibatches learned by the model each
+                           time learn() is called
+            @param prioritized True to draw the samples proportionally to their
+                               priority, False to draw them uniformly
+            @param alpha Exponent applied to the errors to obtain priorities.
+                         0 corresponds to uniform sampling.
+            @param beta Exponent of the importance-sampling weights that
+                        compensate for the non-uniform sampling
+            @param epsilon Small number added to the errors, so that every
+                           sample can be drawn
+            @param rng Random number generator (numpy.random.Generator instance
+                       or the numpy.random module) used to draw the minibatches
+        """
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.updates = updates
+        self.prioritized = prioritized
+        self.alpha = alpha
+        self.beta = beta
+        self.epsilon = epsilon
+        self.rng = rng
+
+        self._inputs = None         # Allocated when the shape of the samples is known
+        self._targets = None
+        self._tree = SumTree(capacity) if prioritized else None
+        self._next = 0              # Position at which the next sample will be stored
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def getState(self):
+        """ Return the samples stored in the buffer, their priorities and the
+            position of the next sample, see AbstractModel.getState()
+        """
+        state = {
+            'next': array(self._next),
+            'size': array(self._size)
+        }
+
+        if self._inputs is not None:
+            state['inputs'] = self._inputs[:self._size]
+            state['targets'] = self._targets[:self._size]
+
+        if self._tree is not None:
+            state['tree'] = self._tree._tree
+
+        if isinstance(self.rng, Generator):
+            state['rng'] = generator_state(self.rng)
+
+        return state
+
+    def setState(self, state):
+        """ Restore a state returned by getState()
+        """
+        if len(state) == 0:
+            return
+
+        self._next = int(state['next'])
+        self._size = int(state['size'])
+
+        if 'inputs' in state:
+            inputs = state['inputs']
+            targets = state['targets']
+
+            # The samples are stored from the beginning of the buffer
+            self._inputs = empty(shape=(self.capacity,) + inputs.shape[1:], dtype=inputs.dtype)
+            self._targets = empty(shape=(self.capacity,) + targets.shape[1:], dtype=targets.dtype)
+            self._inputs[:self._size] = inputs
+            self._targets[:self._size] = targets
+
+        if self._tree is not None and 'tree' in state:
+            self._tree._tree[:] = state['tree']
+
+        if 'rng' in state and isinstance(self.rng, Generator):
+            set_generator_state(self.rng, state['rng'])
+
+    def add(self, inputs, targets):
+        """ Store samples (arrays having one row per sample) in the buffer. The
+            new samples receive the largest priority, so that they are drawn
+            at least once.
+        """
+        if self._inputs is None:
+            self._inputs = empty(shape=(self.capacity,) + inputs.shape[1:], dtype=inputs.dtype)
+            self._targets = empty(shape=(self.capacity,) + targets.shape[1:], dtype=targets.dtype)
+
+        count = min(len(inputs), self.capacity)
+        indexes = (self._next + arange(count)) % self.capacity
+
+        self._inputs[indexes] = inputs[-count:]
+        self._targets[indexes] = targets[-count:]
+        self._next = (self._next + count) % self.capacity
+        self._size = min(self._size + count, self.capacity)
+
+        if self._tree is not None:
+            priority = self._tree.max() if self._tree.total() > 0.0 else 1.0
+
+            self._tree.update(indexes, priority)
+
+    def sample(self):
+        """ Draw a minibatch of samples.
+
+            @return A tuple (indexes, inputs, targets, weights), weights being
+                    the importance-sampling weights of the samples
+        """
+        count = min(self.batch_size, self._size)
+
+        if self._tree is None:
+            indexes = self.rng.choice(self._size, count)
+            weights = ones(shape=(count,), dtype=float64)
+        else:
+            # Draw one sample in each of count segments of the cumulative priorities
+            total = self._tree.total()
+            values = (arange(count) + self.rng.random(count)) * (total / count)
+            indexes = minimum(self._tree.find(values), self._size - 1)
+
+            # Importance-sampling weights, normalized so that the largest one is 1
+            probabilities = maximum(self._tree[indexes] / total, 1e-12)
+            weights = (self._size * probabilities) ** -self.beta
+            weights /= weights.max()
+
+        return (indexes, self._inputs[indexes], self._targets[indexes], weights)
+
+    def updatePriorities(self, indexes, errors):
+        """ Set the priority of the samples @p indexes from the errors of the model
+            on them
+        """
+        if self._tree is not None:
+            self._tree.update(indexes, (abs(errors) + self.epsilon) ** self.alpha)
+
+    def learn(self, model, episodes):
+        """ Store the samples of @p episodes and let @p model learn from
+            minibatches drawn from the buffer
+        """
+        for episode in episodes:
+            inputs, targets = model.samples(episode)
+
+            if len(inputs) > 0:
+                self.add(inputs, targets)
+
+        if self._size == 0:
+            return
+
+        for i in range(self.updates):
+            indexes, inputs, targets, weights = self.sample()
+            errors = model.learnSamples(inputs, targets, weights)
+
+            self.updatePriorities(indexes, errors)
@@ -52,6 +52,9 @@ class TMazeWorld(AbstractWorld):
     def nb_actions(self):
         return 4
 
+    def stateRanges(self):
+        return [(0, self.length - 1), (0, 2)]
+
     def reset(self):
         # The current position is set to the initial position
         self._current_pos = 0
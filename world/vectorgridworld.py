@@ -0,0 +1,155 @@
+#
+# Copyright (c) 2015 Vrije Universiteit Brussel
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import random
+
+from numpy import zeros, asarray, array
+
+from .abstractvectorworld import *
+from .gridworld import *
+
+class VectorGridWorld(AbstractVectorWorld):
+    """ Several copies of a GridWorld, stepped at the same time using precomputed
+        transition tables. The tables are built by running the scalar world
+        from every possible agent state, so each copy behaves exactly like
+        the scalar world.
+    """
+
+    def __init__(self, nb_copies, width, height, initial, goal, obstacle, stochastic, rngs=None):
+        """ Create @p nb_copies copies of a grid world.
+
+            @param rngs List of random number generators, one per copy, used
+                        to draw stochastic initial positions. By default, all
+                        the copies use the random module.
+
+            The other parameters are the ones of GridWorld.__init__().
+        """
+        super(VectorGridWorld, self).__init__()
+
+        self.width = width
+        self.height = height
+        self.goal = goal
+        self.obstacle = obstacle
+        self.stochastic = stochastic
+        self.rngs = rngs or [random] * nb_copies
+
+        self._initial = [initial] * nb_copies
+        self._state = zeros(shape=(nb_copies,), dtype=int)
+
+        self._prototype = self.makeWorld(width, height, initial, goal, obstacle)
+        self.buildTables(self._prototype)
+
+        # Reset the copies like the scalar worlds do in their constructor
+        for index in range(nb_copies):
+            self.resetCopy(index)
+
+    def makeWorld(self, width, height, initial, goal, obstacle):
+        """ Return a deterministic instance of the scalar world simulated by
+            this vector world.
+        """
+        return GridWorld(width, height, initial, goal, obstacle, False)
+
+    def nb_states(self):
+        """ Number of internal states in which an agent can be
+        """
+        return self.width * self.height
+
+    def setWorldState(self, world, state):
+        """ Put the agent of a scalar world in the internal state @p state
+        """
+        world._current_pos = (state % self.width, state // self.width)
+
+    def worldState(self, world):
+        """ Return the internal state of the agent of a scalar world
+        """
+        return world._current_pos[0] + world._current_pos[1] * self.width
+
+    def initialWorldState(self, initial):
+        """ Return the internal state of an agent reset to position @p initial
+        """
+        return initial[0] + initial[1] * self.width
+
+    def buildTables(self, world):
+        """ Fill the transition, reward, termination and observation tables by
+            performing every action from every state in a scalar world.
+        """
+        nb_states = self.nb_states()
+        nb_actions = self.nb_actions()
+
+        self._next = zeros(shape=(nb_states, nb_actions), dtype=int)
+        self._rewards = zeros(shape=(nb_states, nb_actions))
+        self._finished = zeros(shape=(nb_states, nb_actions), dtype=bool)
+        self._observations = None
+
+        for state in range(nb_states):
+            for action in range(nb_actions):
+                self.setWorldState(world, state)
+                observation, reward, finished = world.performAction(action)
+
+                if self._observations is None:
+                    self._observations = zeros(shape=(nb_states, nb_actions, len(observation)))
+
+                self._next[state, action] = self.worldState(world)
+                self._rewards[state, action] = reward
+                self._finished[state, action] = finished
+                self._observations[state, action] = observation
+
+    def nb_copies(self):
+        return len(self._state)
+
+    def nb_actions(self):
+        return 4
+
+    def stateRanges(self):
+        return self._prototype.stateRanges()
+
+    def getState(self):
+        state = super(VectorGridWorld, self).getState()
+        state['initial'] = array(self._initial)
+
+        return state
+
+    def setState(self, state):
+        super(VectorGridWorld, self).setState(state)
+        self._initial = [tuple(initial) for initial in state['initial'].tolist()]
+
+    def initialState(self, index):
+        return self._initial[index]
+
+    def resetCopy(self, index):
+        self._state[index] = self.initialWorldState(self._initial[index])
+
+        if self.stochastic:
+            rng = self.rngs[index]
+            self._initial[index] = (rng.randrange(self.width), rng.randrange(self.height))
+
+    def performActions(self, indices, actions):
+        indices = asarray(indices)
+        actions = asarray(actions)
+        states = self._state[indices]
+
+        self._state[indices] = self._next[states, actions]
+
+        return (
+            self._observations[states, actions],
+            self._rewards[states, actions],
+            self._finished[states, actions]
+        )
@@ -0,0 +1,54 @@
+#
+# Copyright (c) 2015 Vrije Universiteit Brussel
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from .vectorgridworld import *
+from .polargridworld import *
+
+class VectorPolarGridWorld(VectorGridWorld):
+    """ Several copies of a PolarGridWorld, see VectorGridWorld. The internal
+        state of an agent is made of its position and its direction.
+    """
+
+    def __init__(self, nb_copies, width, height, initial, goal, obstacle, stochastic, rngs=None):
+        super(VectorPolarGridWorld, self).__init__(nb_copies, width, height, initial, goal, obstacle, stochastic, rngs)
+
+    def makeWorld(self, width, height, initial, goal, obstacle):
+        return PolarGridWorld(width, height, initial, goal, obstacle, False)
+
+    def nb_states(self):
+        return self.width * self.height * 4
+
+    def setWorldState(self, world, state):
+        cell = state % (self.width * self.height)
+
+        world._current_pos = (cell % self.width, cell // self.width)
+        world._current_dir = state // (self.width * self.height)
+
+    def worldState(self, world):
+        cell = world._current_pos[0] + world._current_pos[1] * self.width
+
+        return cell + world._current_dir * self.width * self.height
+
+    def initialWorldState(self, initial):
+        # PolarGridWorld.reset() makes the agent look to the right
+        cell = initial[0] + initial[1] * self.width
+
+        return cell + PolarGridWorld.RIGHT * self.width * self.height
@@ -0,0 +1,74 @@
+#
+# Copyright (c) 2015 Vrije Universiteit Brussel
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from .abstractvectorworld import *
+from serialization import *
+
+class VectorWorld(AbstractVectorWorld):
+    """ Vector world made of several instances of a "normal" world. Each instance
+        is stepped independently, but the values of all the instances are
+        predicted at once.
+    """
+
+    def __init__(self, worlds):
+        """ Constructor.
+
+            @param worlds List of independent worlds, all of the same kind. The
+                          encoding of the first world is used for all of them.
+        """
+        super(VectorWorld, self).__init__()
+
+        self.worlds = worlds
+        self.encoding = worlds[0].encoding
+
+    def nb_copies(self):
+        return len(self.worlds)
+
+    def nb_actions(self):
+        return self.worlds[0].nb_actions()
+
+    def stateRanges(self):
+        return self.worlds[0].stateRanges()
+
+    def getState(self):
+        state = super(VectorWorld, self).getState()
+
+        for index, world in enumerate(self.worlds):
+            state.update(prefixed('world%i' % index, world.getState()))
+
+        return state
+
+    def setState(self, state):
+        super(VectorWorld, self).setState(state)
+
+        for index, world in enumerate(self.worlds):
+            world.setState(unprefixed('world%i' % index, state))
+
+    def initialState(self, index):
+        return self.worlds[index].initial
+
+    def resetCopy(self, index):
+        self.worlds[index].reset()
+
+    def performActions(self, indices, actions):
+        results = [self.worlds[index].performAction(action) for index, action in zip(indices, actions)]
+
+        return tuple(zip(*results))